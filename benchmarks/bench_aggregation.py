@@ -0,0 +1,60 @@
+"""Micro-benchmark of the hourly aggregation of TSDB values.
+
+Run from the repository root, in an environment with Home Assistant installed:
+
+    python -m benchmarks.bench_aggregation --days 365 --meters 10
+"""
+import argparse
+from datetime import datetime, timedelta
+import time
+from zoneinfo import ZoneInfo
+
+from custom_components.homewizard_cloud_watermeter.aggregation import HourlyBinner, iter_statistics
+
+
+def build_day(day: datetime, bucket_minutes: int = 15) -> list[dict]:
+    """Build the values of a day as returned by the TSDB reader."""
+    values = []
+    current = day
+    end = day + timedelta(days=1)
+
+    while current < end:
+        values.append({
+            "time": current.isoformat(),
+            "water": float((current.hour * 7 + current.minute) % 11),
+        })
+        current = (current.astimezone(ZoneInfo("UTC")) + timedelta(minutes=bucket_minutes)).astimezone(day.tzinfo)
+
+    return values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--meters", type=int, default=10)
+    parser.add_argument("--timezone", default="Europe/Amsterdam")
+    args = parser.parse_args()
+
+    timezone = ZoneInfo(args.timezone)
+    first_day = datetime(2024, 1, 1, tzinfo=timezone)
+    days = [build_day(first_day + timedelta(days=offset)) for offset in range(args.days)]
+    points = sum(len(day) for day in days) * args.meters
+
+    binning = 0.0
+    streaming = 0.0
+    hours = 0
+    for _ in range(args.meters):
+        start = time.perf_counter()
+        binner = HourlyBinner(timezone)
+        for values in days:
+            binner.add(values)
+        binned = time.perf_counter()
+        hours += sum(1 for _ in iter_statistics(binner.bins, 0.0))
+        binning += binned - start
+        streaming += time.perf_counter() - binned
+
+    print(f"{points} points binned in {binning:.3f} s ({points / binning:,.0f} points/s)")
+    print(f"{hours} hourly statistics streamed in {streaming:.3f} s ({hours / streaming:,.0f} hours/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""End-to-end benchmarks of the API client and coordinator against a local cloud."""
+from datetime import timedelta
+import time
+import tracemalloc
+
+import aiohttp
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+from custom_components.homewizard_cloud_watermeter.backfill import HomeWizardHistoryBackfill
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN, CONF_EMAIL, CONF_PASSWORD
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+from custom_components.homewizard_cloud_watermeter.metrics import ApiMetrics
+from custom_components.homewizard_cloud_watermeter.transport import HomeWizardTransport
+
+from tests.mock_cloud import HOME_ID, MockHomeWizardCloud
+
+# Simulated round trip of the cloud endpoints
+LATENCY = 0.05
+
+
+def _create_coordinator(hass: HomeAssistant, session: aiohttp.ClientSession, cloud: MockHomeWizardCloud, metrics: ApiMetrics | None = None):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_EMAIL: "bench@example.com", CONF_PASSWORD: "bench", "home_id": HOME_ID},
+    )
+    entry.add_to_hass(hass)
+
+    api = HomeWizardCloudApi("bench@example.com", "bench", session, "benchmark", base_urls=cloud.base_urls, metrics=metrics)
+
+    return entry, api, HomeWizardCloudDataUpdateCoordinator(hass, entry, api, HOME_ID)
+
+
+async def _measure(coro):
+    """Run a coroutine and return its result, duration and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = await coro
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+@pytest.mark.parametrize("meters", [1, 10, 100, 500])
+async def bench_update_cycle(hass: HomeAssistant, benchmark_report, meters: int) -> None:
+    """Measure a first and a steady state update cycle, without the recorder."""
+    async with MockHomeWizardCloud(devices=meters, latency=LATENCY) as cloud, aiohttp.ClientSession() as session:
+        _, api, coordinator = _create_coordinator(hass, session, cloud)
+
+        data, elapsed, peak = await _measure(coordinator._async_update_data())
+        assert len(data) == meters
+        benchmark_report.add("first_cycle", meters, 1, elapsed, cloud.total_requests, peak)
+
+        cloud.requests.clear()
+        data, elapsed, peak = await _measure(coordinator._async_update_data())
+        assert len(data) == meters
+        benchmark_report.add("steady_cycle", meters, 1, elapsed, cloud.total_requests, peak)
+
+        api.shutdown()
+
+
+@pytest.mark.parametrize(("meters", "days"), [(1, 1), (1, 30), (1, 365), (10, 30), (10, 365), (100, 30)])
+async def bench_backfill(recorder_mock, hass: HomeAssistant, benchmark_report, meters: int, days: int) -> None:
+    """Measure the import of a history into the recorder statistics."""
+    async with MockHomeWizardCloud(devices=meters, latency=LATENCY) as cloud, aiohttp.ClientSession() as session:
+        entry, api, coordinator = _create_coordinator(hass, session, cloud)
+        coordinator.data = await coordinator._async_update_data()
+        await async_wait_recording_done(hass)
+
+        backfill = HomeWizardHistoryBackfill(hass, coordinator, entry.entry_id)
+        end = dt_util.now().date() - timedelta(days=1)
+        start = end - timedelta(days=days - 1)
+
+        cloud.requests.clear()
+        _, elapsed, peak = await _measure(backfill.async_backfill(start, end))
+        await async_wait_recording_done(hass)
+        benchmark_report.add("backfill", meters, days, elapsed, cloud.total_requests, peak)
+
+        api.shutdown()
+
+
+@pytest.mark.parametrize("transport", ["shared", "account"])
+async def bench_transport(hass: HomeAssistant, benchmark_report, transport: str) -> None:
+    """Compare the bytes and connections of two update cycles on the shared and the account session.
+
+    The shared session is the one of Home Assistant the client used before,
+    the connections are the ones the stand-in cloud saw requests on.
+    """
+    meters = 100
+    metrics = ApiMetrics()
+
+    async with MockHomeWizardCloud(devices=meters, latency=LATENCY, compress=True) as cloud:
+        if transport == "account":
+            session_owner = HomeWizardTransport(hass, metrics.connections)
+            session = session_owner.session
+        else:
+            session_owner = None
+            session = async_get_clientsession(hass)
+
+        _, api, coordinator = _create_coordinator(hass, session, cloud, metrics)
+
+        async def run_cycles():
+            for _ in range(2):
+                assert len(await coordinator._async_update_data()) == meters
+
+        _, elapsed, peak = await _measure(run_cycles())
+
+        received = sum(endpoint.bytes_received for endpoint in metrics.endpoints.values())
+        transferred = sum(endpoint.bytes_transferred for endpoint in metrics.endpoints.values())
+
+        benchmark_report.add("transport_" + transport, meters, 1, elapsed, cloud.total_requests, peak, {
+            "kib_received": round(received / 1024),
+            "kib_transferred": round(transferred / 1024),
+            "connections": len(cloud.connections),
+        })
+
+        api.shutdown()
+        if session_owner:
+            session_owner.async_detach()
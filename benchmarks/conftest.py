@@ -0,0 +1,81 @@
+"""Fixtures and reporting of the end-to-end benchmark suite.
+
+Run from the repository root:
+
+    pytest benchmarks --benchmark-save results.json
+    pytest benchmarks --benchmark-baseline results.json
+
+With a baseline, a benchmark fails when its latency or peak memory exceeds the
+baseline by more than the tolerance, or when it sends more requests.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("homewizard benchmarks")
+    group.addoption("--benchmark-baseline", help="JSON results of a previous run to compare against")
+    group.addoption("--benchmark-save", help="Write the results of this run to a JSON file")
+    group.addoption("--benchmark-tolerance", type=float, default=1.5, help="Allowed latency and memory ratio against the baseline")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_sockets(socket_enabled):
+    """Allow the local stand-in cloud server, sockets are blocked by the test plugin."""
+    yield
+
+
+class BenchmarkReport:
+    """Collect benchmark results and check them against a baseline."""
+
+    def __init__(self, baseline: dict, tolerance: float):
+        self.results: dict[str, dict] = {}
+        self._baseline = baseline
+        self._tolerance = tolerance
+
+    def add(self, name: str, meters: int, days: int, latency: float, requests: int, peak_memory: int, extra: dict | None = None) -> None:
+        """Record a result, extra values being reported without being checked."""
+        key = f"{name}[meters={meters},days={days}]"
+        result = {"latency": latency, "requests": requests, "peak_memory": peak_memory, **(extra or {})}
+        self.results[key] = result
+
+        baseline = self._baseline.get(key)
+        if baseline is None:
+            return
+
+        assert result["requests"] <= baseline["requests"], f"{key} sends {requests} requests, baseline {baseline['requests']}"
+        assert result["latency"] <= baseline["latency"] * self._tolerance, f"{key} took {latency:.3f} s, baseline {baseline['latency']:.3f} s"
+        assert result["peak_memory"] <= baseline["peak_memory"] * self._tolerance, f"{key} peaked at {peak_memory} B, baseline {baseline['peak_memory']} B"
+
+
+@pytest.fixture(scope="session")
+def benchmark_report(request) -> BenchmarkReport:
+    baseline_path = request.config.getoption("--benchmark-baseline")
+    baseline = json.loads(Path(baseline_path).read_text()) if baseline_path else {}
+
+    report = BenchmarkReport(baseline, request.config.getoption("--benchmark-tolerance"))
+    request.config._homewizard_benchmark_report = report
+
+    yield report
+
+    save_path = request.config.getoption("--benchmark-save")
+    if save_path:
+        Path(save_path).write_text(json.dumps(report.results, indent=4) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    report = getattr(config, "_homewizard_benchmark_report", None)
+    if report is None or not report.results:
+        return
+
+    terminalreporter.section("HomeWizard benchmarks")
+    terminalreporter.write_line(f"{'benchmark':<50} {'latency (s)':>12} {'requests':>9} {'peak (KiB)':>11}")
+    for key, result in report.results.items():
+        extra = " ".join(f"{name}={value}" for name, value in result.items() if name not in ("latency", "requests", "peak_memory"))
+        terminalreporter.write_line(
+            f"{key:<50} {result['latency']:>12.3f} {result['requests']:>9} {result['peak_memory'] / 1024:>11.0f} {extra}".rstrip()
+        )
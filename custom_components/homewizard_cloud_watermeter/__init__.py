@@ -2,52 +2,108 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.loader import async_get_integration
+from homeassistant.helpers.typing import ConfigType
+import homeassistant.helpers.config_validation as cv
 
-from .api import HomeWizardCloudApi
-from .const import DOMAIN, CONF_EMAIL, CONF_PASSWORD
+from .backfill import HomeWizardHistoryBackfill
+from .const import (
+    DOMAIN,
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_POLLING_PROFILE,
+    CONF_ACCOUNT_DISCOVERY,
+    CONF_GRANULARITY,
+    CONF_SHORT_TERM_STATISTICS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_POLLING_PROFILE,
+    DEFAULT_ACCOUNT_DISCOVERY,
+    DEFAULT_GRANULARITY,
+    DEFAULT_SHORT_TERM_STATISTICS,
+)
 from .coordinator import HomeWizardCloudDataUpdateCoordinator
+from .registry import async_acquire_api, async_get_account_discovery, async_release_api, get_account_id
+from .services import async_setup_services
+from .token_store import HomeWizardTokenStore
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    await async_setup_services(hass)
+
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    session = async_get_clientsession(hass)
-    integration = await async_get_integration(hass, DOMAIN)
-
-    api = HomeWizardCloudApi(
-        entry.data[CONF_EMAIL],
-        entry.data[CONF_PASSWORD],
-        session,
-        integration.version
-    )
+    # Homes of the same account share a single client and token
+    api = await async_acquire_api(hass, entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD])
 
     coordinator = HomeWizardCloudDataUpdateCoordinator(
         hass,
+        entry,
         api,
-        entry.data["home_id"]
+        entry.data["home_id"],
+        entry.options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+        entry.options.get(CONF_POLLING_PROFILE, DEFAULT_POLLING_PROFILE),
+        entry.options.get(CONF_GRANULARITY, DEFAULT_GRANULARITY),
+        entry.options.get(CONF_SHORT_TERM_STATISTICS, DEFAULT_SHORT_TERM_STATISTICS),
+        (
+            async_get_account_discovery(hass, api)
+            if entry.options.get(CONF_ACCOUNT_DISCOVERY, DEFAULT_ACCOUNT_DISCOVERY)
+            else None
+        ),
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore_snapshot():
+        # Entities come up from the last known data, the cloud is queried in the background
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_{entry.entry_id}_first_refresh",
+        )
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            async_release_api(hass, api)
+            raise
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
         "api": api,
+        "backfill": HomeWizardHistoryBackfill(hass, coordinator, entry.entry_id),
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Apply new options by reloading the entry
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Unload all platforms (sensors, etc.)
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
         # Clean up the memory
-        hass.data[DOMAIN].pop(entry.entry_id)
+        async_release_api(hass, hass.data[DOMAIN].pop(entry.entry_id)["api"])
+
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    account_id = get_account_id(entry.data[CONF_EMAIL])
+
+    # Keep the token while other homes of the account still use it
+    for other_entry in hass.config_entries.async_entries(DOMAIN):
+        if other_entry.entry_id != entry.entry_id and get_account_id(other_entry.data[CONF_EMAIL]) == account_id:
+            return
 
-    return unload_ok
\ No newline at end of file
+    await HomeWizardTokenStore(hass, account_id).async_remove()
\ No newline at end of file
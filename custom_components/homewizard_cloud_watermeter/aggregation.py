@@ -0,0 +1,228 @@
+from collections.abc import Iterable, Iterator
+from datetime import datetime, tzinfo
+import time
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.util import dt as dt_util
+
+HOUR = 3600
+# Period of the short-term statistics of the recorder
+SHORT_TERM_PERIOD = 300
+# Usage differences below this are rounding noise, not corrections
+RECONCILIATION_TOLERANCE = 1e-6
+
+
+# Offset in seconds of the two-digit minutes of a timestamp
+MINUTE_OFFSETS = {f"{minute:02d}": minute * 60 for minute in range(60)}
+
+
+class HourlyBinner:
+    """Sum TSDB values per UTC hour using integer epoch arithmetic.
+
+    TSDB values are ordered and the values of an hour share the same timestamp
+    string apart from their minutes. Values of a single day with a single UTC
+    offset, which is every day but the DST transitions, are summed per hour
+    string first, and only the epoch of their midnight is parsed. Other values
+    are binned one by one, the epoch of the hour being parsed when the hour or
+    the UTC offset changes and the minutes added to it, which keeps DST
+    transitions correct.
+
+    A shorter period dividing the hour, such as SHORT_TERM_PERIOD, bins the
+    values per period instead.
+    """
+
+    def __init__(self, timezone: tzinfo | None = None, now: float | None = None, period: int = HOUR):
+        self.bins: dict[int, float] = {}
+        self.period = period
+        self._timezone = timezone or dt_util.get_default_time_zone()
+        # Security: don't process data far in the future
+        self._max_hour = (time.time() if now is None else now) + HOUR
+        self._prefix = None
+        self._suffix = None
+        self._hour_epoch = 0
+
+    def set_now(self, now: float) -> None:
+        """Move the limit of future data of a binner that is kept over time."""
+        self._max_hour = now + HOUR
+
+    def add(self, values: Iterable[dict]) -> float:
+        """Add TSDB values to the bins and return their total."""
+        if isinstance(values, list) and values:
+            first = values[0].get("time")
+            last = values[-1].get("time")
+            # Same day and same explicit UTC offset at both ends, so for every value
+            if (
+                isinstance(first, str)
+                and isinstance(last, str)
+                and len(first) > 19
+                and first[:10] == last[:10]
+                and first[16:] == last[16:]
+            ):
+                try:
+                    return self._add_day(values, first)
+                except (KeyError, TypeError, ValueError):
+                    # Malformed values, bin them one by one
+                    pass
+
+        return self._add_values(values)
+
+    def _add_day(self, values: list[dict], first: str) -> float:
+        """Add the values of a day sharing a single UTC offset, summing them per hour string first."""
+        midnight = self._parse_hour_epoch(f"{first[:11]}00:00{first[16:]}")
+        if midnight is None:
+            raise ValueError(f"Invalid TSDB time: {first}")
+
+        period = self.period
+        # Minutes only matter to periods shorter than the hour, or to offsets that are not whole hours
+        width = 13 if period == HOUR and midnight % HOUR == 0 else 16
+
+        sums: dict[str, float] = {}
+        get = sums.get
+        for entry in values:
+            water = entry["water"]
+            if water is not None:
+                key = entry["time"][:width]
+                sums[key] = get(key, 0) + water
+
+        # Hours of a fixed UTC offset are whole hours apart from its midnight
+        max_hour = self._max_hour
+        usages = []
+        for key, usage in sums.items():
+            timestamp = midnight + int(key[11:13]) * HOUR
+            if width == 16:
+                timestamp += MINUTE_OFFSETS[key[14:16]]
+            start = timestamp - timestamp % period
+            if start <= max_hour:
+                usages.append((start, float(usage)))
+
+        bins = self.bins
+        total = 0.0
+        for start, usage in usages:
+            if start in bins:
+                bins[start] += usage
+            else:
+                bins[start] = usage
+            total += usage
+
+        return total
+
+    def _add_values(self, values: Iterable[dict]) -> float:
+        """Add values one by one, whatever their days and UTC offsets."""
+        bins = self.bins
+        max_hour = self._max_hour
+        prefix = self._prefix
+        suffix = self._suffix
+        hour_epoch = self._hour_epoch
+        period = self.period
+        total = 0.0
+
+        for entry in values:
+            water = entry.get("water")
+            # Ignore nulls (mainly future hours)
+            if water is None:
+                continue
+
+            raw = entry["time"]
+            if raw[:13] != prefix or raw[16:] != suffix:
+                parsed = self._parse_hour_epoch(raw)
+                if parsed is None:
+                    continue
+                prefix = raw[:13]
+                suffix = raw[16:]
+                hour_epoch = parsed
+
+            timestamp = hour_epoch + MINUTE_OFFSETS[raw[14:16]]
+            start = timestamp - timestamp % period
+            if start > max_hour:
+                continue
+
+            usage = float(water)
+            if start in bins:
+                bins[start] += usage
+            else:
+                bins[start] = usage
+            total += usage
+
+        self._prefix = prefix
+        self._suffix = suffix
+        self._hour_epoch = hour_epoch
+
+        return total
+
+    def _parse_hour_epoch(self, raw: str) -> int | None:
+        """Return the epoch of the raw timestamp with its minutes removed."""
+        if not isinstance(raw, str) or len(raw) < 16 or raw[13] != ":" or raw[14:16] not in MINUTE_OFFSETS:
+            return None
+
+        try:
+            parsed = datetime.fromisoformat(raw)
+        except ValueError:
+            return None
+
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=self._timezone)
+
+        return int(parsed.timestamp()) - parsed.minute * 60
+
+
+def rollup_bins(bins: dict[int, float], period: int = HOUR) -> dict[int, float]:
+    """Sum bins of a shorter period into bins of the given period."""
+    rolled: dict[int, float] = {}
+
+    for start, usage in bins.items():
+        start -= start % period
+        rolled[start] = rolled.get(start, 0.0) + usage
+
+    return rolled
+
+
+def find_reconciliation_start(
+    bins: dict[int, float],
+    imported: dict[int, float],
+    last_start: float | None,
+    last_sum: float,
+) -> tuple[int | None, float]:
+    """Return the first hour of bins to import again, and the sum reached before it.
+
+    Hours after last_start are new. Earlier hours are compared with the usage
+    imported for them, an hour of the imported window that was never written
+    counting as no usage. Hours before that window can not be compared and are
+    left alone. Returns None when nothing changed.
+    """
+    window_start = min(imported) if imported else None
+    earliest = None
+
+    for start in sorted(bins):
+        if last_start is None or start > last_start:
+            earliest = start
+            break
+
+        if window_start is None or start < window_start:
+            continue
+
+        if abs(bins[start] - imported.get(start, 0.0)) > RECONCILIATION_TOLERANCE:
+            earliest = start
+            break
+
+    if earliest is None:
+        return None, last_sum
+
+    # Remove the usage imported from the earliest hour on to get the sum before it
+    base_sum = last_sum - sum(usage for start, usage in imported.items() if start >= earliest)
+
+    return earliest, base_sum
+
+
+def iter_statistics(bins: dict[int, float], last_sum: float) -> Iterator[StatisticData]:
+    """Stream statistics in order, with a cumulative sum starting from last_sum."""
+    cumulative_sum = last_sum
+
+    for start in sorted(bins):
+        usage = bins[start]
+        cumulative_sum += usage
+
+        yield StatisticData(
+            start=dt_util.utc_from_timestamp(start),
+            state=usage,
+            sum=cumulative_sum,
+        )
@@ -1,58 +1,104 @@
 import aiohttp
-import async_timeout
+import asyncio
 import datetime
+import json
 import logging
 import time
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .metrics import ApiMetrics
+from .resilience import CircuitBreaker
 
 _LOGGER = logging.getLogger(__name__)
 
+# Base URL of each endpoint of the HomeWizard cloud
+BASE_URLS = {
+    "auth": "https://api.homewizardeasyonline.com",
+    "locations": "https://homes.api.homewizard.com",
+    "graphql": "https://api.homewizard.energy",
+    "tsdb": "https://tsdb-reader.homewizard.com",
+}
+
+# Connect and read timeouts of each endpoint, TSDB responses of many devices are the slowest to come
+ENDPOINT_TIMEOUTS = {
+    "auth": aiohttp.ClientTimeout(total=20, connect=5, sock_read=10),
+    "locations": aiohttp.ClientTimeout(total=20, connect=5, sock_read=10),
+    "graphql": aiohttp.ClientTimeout(total=30, connect=5, sock_read=20),
+    "tsdb": aiohttp.ClientTimeout(total=45, connect=5, sock_read=30),
+}
+
+# Decode responses with orjson when it is installed, it is bundled with Home Assistant
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# Renew the token in the background this long before it expires
+TOKEN_REFRESH_AHEAD = 300
+# Delay before retrying a failed background renewal
+TOKEN_REFRESH_RETRY = 60
+
 class HomeWizardCloudApi:
     """ApiClient for HomeWizard Cloud API."""
 
-    def __init__(self, username, password, session: aiohttp.ClientSession, version: str):
+    def __init__(self, username, password, session: aiohttp.ClientSession, version: str, cache=None, token_store=None, base_urls: dict[str, str] | None = None, metrics: ApiMetrics | None = None):
         self._username = username
         self._password = password
         self._session = session
+        # Endpoints can be pointed to another server, e.g. a local stand-in for benchmarks
+        self._base_urls = {**BASE_URLS, **(base_urls or {})}
+        # Optional cache of TSDB responses, consulted before going to the network
+        self.cache = cache
+        # Optional storage persisting the token across restarts
+        self._token_store = token_store
         self._token = None
         self._token_expires_at = 0
+        self._token_lock = asyncio.Lock()
+        self._token_refresh_handle: asyncio.TimerHandle | None = None
+        self._token_refresh_task: asyncio.Task | None = None
+        # Whether the TSDB reader returns a separate series per device for batched requests
+        self.tsdb_batch_supported = True
+        # Shared with the transport of the session, counting its connections
+        self.metrics = metrics or ApiMetrics()
+        # Each endpoint is served by its own host
+        self.circuit_breakers = {endpoint: CircuitBreaker(endpoint) for endpoint in self._base_urls}
         self._user_agent = f"HomeWizardCloudWatermeter/{version} (+https://github.com/pyrech/homewizard_cloud_watermeter)"
 
     async def async_authenticate(self) -> bool:
         """Authenticate with the Basic Auth to get a Bearer token."""
-        url = "https://api.homewizardeasyonline.com/v1/auth/account/token"
+        url = f"{self._base_urls["auth"]}/v1/auth/account/token"
         auth = aiohttp.BasicAuth(self._username, self._password)
 
         try:
-            async with async_timeout.timeout(10):
-                async with self._session.get(url, auth=auth, headers={"User-Agent": self._user_agent}) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self._token = data.get("access_token")
-                        # Store expiration time (current time + expires_in)
-                        # We subtract 60 seconds as a safety margin
-                        expires_in = data.get("expires_in", 3600)
-                        self._token_expires_at = time.time() + expires_in - 60
-                        _LOGGER.debug("Successfully authenticated to HomeWizard API. Token expires in %s s", expires_in)
-                        return True
-
-                    _LOGGER.error("Failed to authenticate to HomeWizard API, got HTTP error: %s", response.status)
-                    return False
+            status, data = await self._async_request("auth", "GET", url, auth=auth, headers={"User-Agent": self._user_agent})
+            if status == 200:
+                self._token = data.get("access_token")
+                # Store expiration time (current time + expires_in)
+                # We subtract 60 seconds as a safety margin
+                expires_in = data.get("expires_in", 3600)
+                self._token_expires_at = time.time() + expires_in - 60
+                _LOGGER.debug("Successfully authenticated to HomeWizard API. Token expires in %s s", expires_in)
+                self._schedule_token_refresh()
+                await self._async_save_token()
+                return True
+
+            _LOGGER.error("Failed to authenticate to HomeWizard API, got HTTP error: %s", status)
+            return False
         except Exception as ex:
             _LOGGER.error("Error connecting to HomeWizard API: %s", ex)
             return False
 
     async def async_get_locations(self) -> list:
             """Get the list of locations associated with the account."""
-            url = "https://homes.api.homewizard.com/locations"
-            headers = await self.get_headers()
-
+            url = f"{self._base_urls["locations"]}/locations"
             try:
-                async with async_timeout.timeout(10):
-                    async with self._session.get(url, headers=headers) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        _LOGGER.error("Failed to fetch HomeWizard locations: %s", response.status)
-                        return []
+                status, data = await self._async_authorized_request("locations", "GET", url)
+                if status == 200:
+                    return data
+                _LOGGER.error("Failed to fetch HomeWizard locations: %s", status)
+                return []
             except Exception as ex:
                 _LOGGER.error("Error fetching HomeWizard locations: %s", ex)
                 return []
@@ -71,54 +117,273 @@ class HomeWizardCloudApi:
 
         return await self.call_graphql(payload)
 
-    async def async_get_tsdb_data(self, date: datetime, timezone: str, deviceIdentifier: str) -> dict:
-        """Fetch time-series data."""
-        url = f"https://tsdb-reader.homewizard.com/devices/date/{date.strftime("%Y/%m/%d")}"
-        headers = await self.get_headers()
+    async def async_get_devices_of_homes(self, home_ids: list[int]) -> dict[int, dict] | None:
+        """Get the device lists of several homes with a single aliased query.
+
+        Returns the response of each home in the format of async_get_devices,
+        or None when the request failed.
+        """
+        return await self._async_query_homes(
+            "DeviceList",
+            "devices { identifier name wifiStrength ... on CloudDevice { type model hardwareVersion onlineState }}",
+            home_ids,
+        )
+
+    async def async_get_device_states_of_homes(self, home_ids: list[int]) -> dict[int, dict] | None:
+        """Get the device states of several homes with a single aliased query.
+
+        Returns the response of each home in the format of async_get_device_states,
+        or None when the request failed.
+        """
+        return await self._async_query_homes(
+            "DeviceStates",
+            "devices { identifier wifiStrength ... on CloudDevice { onlineState }}",
+            home_ids,
+        )
+
+    async def _async_query_homes(self, operation: str, fields: str, home_ids: list[int]) -> dict[int, dict] | None:
+        """Query the same fields of several homes, each home under its own alias."""
+        if not home_ids:
+            return {}
+
+        payload = {
+            "operationName": operation,
+            "variables": {
+                f"homeId{index}": home_id for index, home_id in enumerate(home_ids)
+            },
+            "query": (
+                f"query {operation}("
+                + ", ".join(f"$homeId{index}: Int!" for index in range(len(home_ids)))
+                + ") {"
+                + " ".join(f"home{index}: home(id: $homeId{index}) {{ {fields} }}" for index in range(len(home_ids)))
+                + "}"
+            )
+        }
+
+        response = await self.call_graphql(payload)
+        if not response:
+            return None
+
+        data = response.get("data") or {}
+        result = {}
+        for index, home_id in enumerate(home_ids):
+            home = data.get(f"home{index}")
+            if home is None:
+                # Errors of a home only concern its alias
+                result[home_id] = {"errors": response.get("errors") or [f"Home {home_id} not found"]}
+            else:
+                result[home_id] = {"data": {"home": home}}
+
+        return result
 
+    async def async_get_device_states(self, home_id: int) -> dict:
+        """Get the volatile state of the devices, without their metadata."""
         payload = {
+            "operationName": "DeviceStates",
+            "variables": {
+                "homeId": home_id
+            },
+            "query": (
+                "query DeviceStates($homeId: Int!) {home(id: $homeId) { devices { identifier wifiStrength ... on CloudDevice { onlineState }}}}"
+            )
+        }
+
+        return await self.call_graphql(payload)
+
+    async def async_get_tsdb_data(self, date: datetime, timezone: str, deviceIdentifier: str, granularity: str = "15m") -> dict:
+        """Fetch time-series data."""
+        payload = self._build_tsdb_payload(timezone, [deviceIdentifier], granularity)
+
+        cached = self._get_cached_tsdb(deviceIdentifier, date, payload)
+        if cached is not None:
+            return cached
+
+        response = await self._async_post_tsdb(date, payload)
+        if response is not None:
+            self._set_cached_tsdb(deviceIdentifier, date, payload, response)
+
+        return response
+
+    async def async_get_tsdb_data_batch(self, date: datetime, timezone: str, device_identifiers: list[str], granularity: str = "15m") -> dict | None:
+        """Fetch time-series data of several devices in a single request.
+
+        Returns the payloads keyed by device identifier, or None when the request
+        failed or when the response could not be split per device.
+        """
+        payload = self._build_tsdb_payload(timezone, device_identifiers, granularity)
+
+        result = {}
+        for identifier in device_identifiers:
+            cached = self._get_cached_tsdb(identifier, date, payload)
+            if cached is not None:
+                result[identifier] = cached
+
+        missing = [identifier for identifier in device_identifiers if identifier not in result]
+        if not missing:
+            return result
+
+        payload = self._build_tsdb_payload(timezone, missing, granularity)
+        response = await self._async_post_tsdb(date, payload)
+        if response is None:
+            return None
+
+        split = self._split_tsdb_response(response, missing)
+        if split is None:
+            # The endpoint merged the series, remember it to stop sending batched requests
+            _LOGGER.debug("HomeWizard TSDB response can not be split per device, disabling batched requests")
+            self.tsdb_batch_supported = False
+            return None
+
+        for identifier, device_response in split.items():
+            self._set_cached_tsdb(identifier, date, payload, device_response)
+
+        return {**result, **split}
+
+    def _get_cached_tsdb(self, device_identifier: str, date: datetime, payload: dict) -> dict | None:
+        """Return the cached TSDB response of a device, if any."""
+        if self.cache is None:
+            return None
+
+        return self.cache.get(device_identifier, date.date(), payload["gb"], payload["tz"])
+
+    def _set_cached_tsdb(self, device_identifier: str, date: datetime, payload: dict, response: dict) -> None:
+        """Store a TSDB response in the cache, which decides whether it can be kept."""
+        if self.cache is None:
+            return
+
+        self.cache.set(device_identifier, date.date(), payload["gb"], payload["tz"], response)
+
+    def _build_tsdb_payload(self, timezone: str, device_identifiers: list[str], granularity: str = "15m") -> dict:
+        """Build the TSDB request payload for the given devices, with buckets of the given width."""
+        return {
             "devices": [
                 {
-                    "identifier": deviceIdentifier,
+                    "identifier": identifier,
                     "measurementType": "water"
                 }
+                for identifier in device_identifiers
             ],
             "type": "water",
             "values": True,
             "wattage": True,
-            "gb": "15m",
+            "gb": granularity,
             "tz": timezone,
             "fill": "linear",
             "three_phases": False
         }
 
+    @staticmethod
+    def _split_tsdb_response(response: dict, device_identifiers: list[str]) -> dict | None:
+        """Split a TSDB response back into one payload per device."""
+        if len(device_identifiers) == 1:
+            return {device_identifiers[0]: response}
+
+        # Per-device series, either as a list of devices or keyed by identifier
+        devices = response.get("devices")
+        if isinstance(devices, list):
+            split = {
+                device["identifier"]: device
+                for device in devices
+                if isinstance(device, dict) and "identifier" in device and "values" in device
+            }
+        else:
+            split = {
+                identifier: response[identifier]
+                for identifier in device_identifiers
+                if isinstance(response.get(identifier), dict) and "values" in response[identifier]
+            }
+
+        if not split:
+            return None
+
+        return split
+
+    async def _async_post_tsdb(self, date: datetime, payload: dict) -> dict | None:
+        """Post a request to the TSDB reader for the given day."""
+        url = f"{self._base_urls["tsdb"]}/devices/date/{date.strftime("%Y/%m/%d")}"
         try:
-            async with async_timeout.timeout(10):
-                async with self._session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    _LOGGER.error("Failed to fetch HomeWizard data: %s", response.status)
-                    return None
+            status, data = await self._async_authorized_request("tsdb", "POST", url, json=payload)
+            if status == 200:
+                return data
+            _LOGGER.error("Failed to fetch HomeWizard data: %s", status)
+            return None
         except Exception as ex:
             _LOGGER.error("Error fetching HomeWizard data: %s", ex)
             return None
 
     async def call_graphql(self, payload: dict) -> dict:
         """Call graphql endpoint with given payload."""
-        url = "https://api.homewizard.energy/v1/graphql"
-        headers = await self.get_headers()
-
+        url = f"{self._base_urls["graphql"]}/v1/graphql"
         try:
-            async with async_timeout.timeout(10):
-                async with self._session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    _LOGGER.error("Failed to fetch HomeWizard data: %s", response.status)
-                    return None
+            status, data = await self._async_authorized_request("graphql", "POST", url, json=payload)
+            if status == 200:
+                return data
+            _LOGGER.error("Failed to fetch HomeWizard data: %s", status)
+            return None
         except Exception as ex:
             _LOGGER.error("Error fetching HomeWizard data: %s", ex)
             return None
 
+    async def _async_request(self, endpoint: str, method: str, url: str, **kwargs) -> tuple[int, Any]:
+        """Send a request and record its metrics.
+
+        Returns the HTTP status and the decoded body of successful responses,
+        exceptions are recorded as errors and raised to the caller.
+        CircuitOpenError is raised without sending anything while the host keeps failing.
+        """
+        breaker = self.circuit_breakers[endpoint]
+        breaker.check()
+
+        start = time.monotonic()
+        status = None
+        size = 0
+        transferred = None
+
+        try:
+            async with self._session.request(method, url, timeout=ENDPOINT_TIMEOUTS[endpoint], **kwargs) as response:
+                status = response.status
+                body = await response.read()
+                size = len(body)
+                # Bytes received before decompression
+                transferred = getattr(response.content, "total_raw_bytes", None)
+
+                if status != 200:
+                    return status, None
+
+                return status, json_loads(body)
+        except Exception:
+            # Decoding errors still count as failed requests
+            status = None
+            raise
+        finally:
+            self.metrics.record(endpoint, time.monotonic() - start, status, size, transferred)
+
+            # Client errors tell nothing about the health of the host
+            if status is None or status >= 500 or status == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    async def _async_authorized_request(self, endpoint: str, method: str, url: str, **kwargs) -> tuple[int, Any]:
+        """Send a request with the Bearer token, renewing it and retrying once when it is rejected.
+
+        A restored token can be revoked before its expiry, only the server tells.
+        """
+        headers = await self.get_headers()
+        status, data = await self._async_request(endpoint, method, url, headers=headers, **kwargs)
+        if status != 401:
+            return status, data
+
+        _LOGGER.debug("HomeWizard access token rejected, renewing...")
+        await self._async_renew_rejected_token(headers["Authorization"].removeprefix("Bearer "))
+
+        headers = await self.get_headers()
+        return await self._async_request(endpoint, method, url, headers=headers, **kwargs)
+
+    def is_available(self, endpoint: str) -> bool:
+        """Tell whether requests to an endpoint are currently let through."""
+        return not self.circuit_breakers[endpoint].is_open
+
     async def get_headers(self) -> dict:
         """Get headers for GraphQL/API requests."""
         token = await self.async_ensure_token()
@@ -130,7 +395,89 @@ class HomeWizardCloudApi:
 
     async def async_ensure_token(self) -> str:
         """Check if token is valid and renew it if necessary."""
-        if not self._token or time.time() > self._token_expires_at:
-            _LOGGER.debug("HomeWizard access token expired or missing, renewing...")
-            await self.async_authenticate()
+        if self._is_token_valid():
+            return self._token
+
+        # Single-flight: concurrent callers wait for the renewal in progress
+        async with self._token_lock:
+            if not self._is_token_valid():
+                _LOGGER.debug("HomeWizard access token expired or missing, renewing...")
+                await self.async_authenticate()
+
         return self._token
+
+    async def _async_renew_rejected_token(self, rejected: str) -> None:
+        """Drop a token rejected by the server and renew it, once for all concurrent callers."""
+        async with self._token_lock:
+            # Another caller already renewed it
+            if self._token != rejected:
+                return
+
+            self._token = None
+            self._token_expires_at = 0
+            await self.async_authenticate()
+
+    async def async_restore_token(self) -> bool:
+        """Restore a still valid token from the token storage."""
+        if self._token_store is None:
+            return False
+
+        stored = await self._token_store.async_load()
+        if not stored:
+            return False
+
+        token, expires_at = stored
+        if not token or time.time() > expires_at:
+            return False
+
+        self._token = token
+        self._token_expires_at = expires_at
+        self._schedule_token_refresh()
+        _LOGGER.debug("Restored HomeWizard access token, expires in %s s", int(expires_at - time.time()))
+        return True
+
+    def shutdown(self) -> None:
+        """Cancel the background token renewal."""
+        if self._token_refresh_handle is not None:
+            self._token_refresh_handle.cancel()
+            self._token_refresh_handle = None
+
+        if self._token_refresh_task is not None:
+            self._token_refresh_task.cancel()
+            self._token_refresh_task = None
+
+    def _is_token_valid(self) -> bool:
+        return bool(self._token) and time.time() <= self._token_expires_at
+
+    def _schedule_token_refresh(self, delay: float | None = None) -> None:
+        """Schedule the renewal of the token ahead of its expiry."""
+        if self._token_refresh_handle is not None:
+            self._token_refresh_handle.cancel()
+
+        if delay is None:
+            delay = max(self._token_expires_at - time.time() - TOKEN_REFRESH_AHEAD, 0)
+
+        self._token_refresh_handle = asyncio.get_running_loop().call_later(delay, self._start_token_refresh)
+
+    def _start_token_refresh(self) -> None:
+        self._token_refresh_handle = None
+        self._token_refresh_task = asyncio.get_running_loop().create_task(self._async_refresh_token())
+
+    async def _async_refresh_token(self) -> None:
+        """Renew the token in the background, without blocking requests using the current one."""
+        async with self._token_lock:
+            if await self.async_authenticate():
+                return
+
+        # Retry while the current token is still usable, requests renew it themselves afterwards
+        if self._is_token_valid():
+            self._schedule_token_refresh(TOKEN_REFRESH_RETRY)
+
+    async def _async_save_token(self) -> None:
+        if self._token_store is None:
+            return
+
+        try:
+            await self._token_store.async_save(self._token, self._token_expires_at)
+        except Exception as ex:
+            _LOGGER.warning("Failed to persist HomeWizard access token: %s", ex)
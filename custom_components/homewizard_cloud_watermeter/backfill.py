@@ -0,0 +1,184 @@
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.db_schema import Statistics, StatisticsMeta
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.recorder import session_scope
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .aggregation import iter_statistics
+from .const import DOMAIN, BACKFILL_CHUNK_DAYS, BACKFILL_STORAGE_VERSION, GRANULARITY_1H
+from .coordinator import HomeWizardCloudDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HomeWizardHistoryBackfill:
+    """Import the history of all watermeters of a home into the external statistics.
+
+    Days are fetched and written in chunks. A checkpoint holding the next day
+    and the running sum of every statistic is saved after each chunk, so an
+    interrupted import of the same range resumes where it stopped.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: HomeWizardCloudDataUpdateCoordinator, entry_id: str):
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = Store(hass, BACKFILL_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self._lock = asyncio.Lock()
+
+    async def async_backfill(self, start: date, end: date) -> None:
+        """Backfill the statistics from start to end, both included."""
+        if self._lock.locked():
+            raise HomeAssistantError("A HomeWizard history backfill is already running for this home")
+
+        async with self._lock:
+            await self._async_backfill(start, end)
+
+    async def _async_backfill(self, start: date, end: date) -> None:
+        # Today is still being written by the update cycle
+        end = min(end, dt_util.now().date() - timedelta(days=1))
+        if start > end:
+            raise HomeAssistantError("The backfill range must start before today")
+
+        if not self.coordinator.data:
+            raise HomeAssistantError("No HomeWizard watermeter known yet, nothing to backfill")
+
+        devices = [value["device"] for value in self.coordinator.data.values()]
+
+        checkpoint = await self._async_load_checkpoint(start, end, devices)
+        day = date.fromisoformat(checkpoint["next"])
+
+        if day > start:
+            _LOGGER.info("Resuming HomeWizard history backfill from %s", day)
+
+        while day <= end:
+            chunk = [day + timedelta(days=offset) for offset in range(BACKFILL_CHUNK_DAYS) if day + timedelta(days=offset) <= end]
+            await self._async_backfill_chunk(chunk, devices, checkpoint)
+
+            day = chunk[-1] + timedelta(days=1)
+            checkpoint["next"] = day.isoformat()
+            await self._store.async_save(checkpoint)
+
+        await self._async_shift_tails(devices, end, checkpoint)
+
+        await self._store.async_remove()
+        _LOGGER.info("HomeWizard history backfill from %s to %s completed", start, end)
+
+    async def _async_load_checkpoint(self, start: date, end: date, devices: list[dict]) -> dict:
+        """Return the checkpoint of the range, creating a new one if needed."""
+        statistic_ids = {self.coordinator.get_statistic_id(device) for device in devices}
+
+        checkpoint = await self._store.async_load()
+        if (
+            checkpoint
+            and checkpoint["start"] == start.isoformat()
+            and checkpoint["end"] == end.isoformat()
+            and set(checkpoint["statistics"]) == statistic_ids
+        ):
+            return checkpoint
+
+        range_start = self._local_midnight(start)
+        range_end = self._local_midnight(end + timedelta(days=1))
+
+        statistics = {}
+        for statistic_id in statistic_ids:
+            statistics[statistic_id] = {
+                # Sums continue from the last statistic before the range
+                "sum": await self._async_get_sum_before(statistic_id, range_start),
+                # Sum already reached at the end of the range, to shift what comes after
+                "end_sum": await self._async_get_sum_before(statistic_id, range_end),
+            }
+
+        checkpoint = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "next": start.isoformat(),
+            "statistics": statistics,
+        }
+        await self._store.async_save(checkpoint)
+
+        return checkpoint
+
+    async def _async_backfill_chunk(self, days: list[date], devices: list[dict], checkpoint: dict) -> None:
+        """Fetch a chunk of days for all devices and write their statistics."""
+        identifiers = [device["identifier"] for device in devices]
+
+        # Only hourly statistics are backfilled, hourly buckets keep the payloads small
+        payloads = await asyncio.gather(
+            *(
+                self.coordinator.async_get_tsdb_data_batch(self._local_midnight(day), identifiers, GRANULARITY_1H)
+                for day in days
+            )
+        )
+
+        for device in devices:
+            binner = self.coordinator.create_hourly_binner()
+            for day, day_payloads in zip(days, payloads):
+                payload = day_payloads.get(device["identifier"])
+                if not payload or "values" not in payload:
+                    # Stop here, the checkpoint still points to the start of this chunk
+                    raise HomeAssistantError(f"No HomeWizard data received for {device['identifier']} on {day}")
+                binner.add(payload["values"])
+
+            state = checkpoint["statistics"][self.coordinator.get_statistic_id(device)]
+            stat_data = list(iter_statistics(binner.bins, state["sum"]))
+
+            if stat_data:
+                async_add_external_statistics(self.hass, self.coordinator.build_statistic_metadata(device), stat_data)
+                state["sum"] = stat_data[-1]["sum"]
+
+        _LOGGER.debug("Backfilled HomeWizard history from %s to %s", days[0], days[-1])
+
+    async def _async_shift_tails(self, devices: list[dict], end: date, checkpoint: dict) -> None:
+        """Shift the sums of the statistics after the range to keep them continuous.
+
+        The cursors of the update cycle are shifted along. The adjustment is queued
+        to the recorder after the statistics the update cycle already wrote, and
+        the update cycle does not write from a cursor until it is shifted.
+        """
+        after = self._local_midnight(end + timedelta(days=1))
+
+        async with self.coordinator.statistics_lock:
+            for device in devices:
+                statistic_id = self.coordinator.get_statistic_id(device)
+                state = checkpoint["statistics"][statistic_id]
+                shift = state["sum"] - state["end_sum"]
+
+                if shift:
+                    get_instance(self.hass).async_adjust_statistics(statistic_id, after, shift, UnitOfVolume.LITERS)
+                self.coordinator.shift_statistics_cursor(statistic_id, after, shift)
+
+    async def _async_get_sum_before(self, statistic_id: str, before: datetime) -> float:
+        """Return the sum of the last statistic before the given time."""
+        return await get_instance(self.hass).async_add_executor_job(
+            self._get_sum_before, statistic_id, before
+        )
+
+    def _get_sum_before(self, statistic_id: str, before: datetime) -> float:
+        # statistics_during_period extends monthly periods to the end of the month,
+        # read the last hourly row instead, a single lookup of the statistic_id and start index
+        stmt = (
+            select(Statistics.sum)
+            .join(StatisticsMeta, Statistics.metadata_id == StatisticsMeta.id)
+            .where(StatisticsMeta.statistic_id == statistic_id)
+            .where(Statistics.start_ts < before.timestamp())
+            .order_by(Statistics.start_ts.desc())
+            .limit(1)
+        )
+
+        with session_scope(hass=self.hass, read_only=True) as session:
+            last_sum = session.execute(stmt).scalar()
+
+        return last_sum or 0.0
+
+    def _local_midnight(self, day: date) -> datetime:
+        return dt_util.start_of_local_day(day)
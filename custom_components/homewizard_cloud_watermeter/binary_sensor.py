@@ -0,0 +1,70 @@
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+
+from .const import DOMAIN
+from .sensor import HomeWizardBaseSensor
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+    entities = []
+
+    # Create the flow detections of each homewizard device
+    for value in (coordinator.data or {}).values():
+        entities.append(HomeWizardContinuousFlowSensor(coordinator, value))
+        entities.append(HomeWizardLeakSensor(coordinator, value))
+
+    async_add_entities(entities)
+
+class HomeWizardFlowBinarySensor(HomeWizardBaseSensor, BinarySensorEntity):
+    """Detection computed by the coordinator from the rolling flow statistics of the device."""
+
+    @property
+    def is_on(self) -> bool | None:
+        return self._attr_native_value
+
+    def _resolve_value(self, value: dict):
+        # Snapshots of older versions have no flow statistics
+        flow = value.get("flow") or {}
+        self._attr_extra_state_attributes = self._resolve_attributes(flow)
+        return self._resolve_detection(flow)
+
+    def _resolve_detection(self, flow: dict) -> bool | None:
+        raise NotImplementedError
+
+    def _resolve_attributes(self, flow: dict) -> dict:
+        return {}
+
+class HomeWizardContinuousFlowSensor(HomeWizardFlowBinarySensor):
+    def __init__(self, coordinator, data):
+        super().__init__(coordinator, data)
+
+        self._attr_name = "Continuous flow"
+        self._attr_unique_id = f"{self._sanitized_identifier}_continuous_flow"
+        self._attr_icon = "mdi:water-sync"
+
+    def _resolve_detection(self, flow: dict) -> bool | None:
+        return flow.get("continuous_flow")
+
+    def _resolve_attributes(self, flow: dict) -> dict:
+        return {
+            "duration_minutes": flow.get("continuous_flow_minutes"),
+            "mean_flow_24h": flow.get("mean_flow"),
+        }
+
+class HomeWizardLeakSensor(HomeWizardFlowBinarySensor):
+    def __init__(self, coordinator, data):
+        super().__init__(coordinator, data)
+
+        self._attr_name = "Leak suspected"
+        self._attr_unique_id = f"{self._sanitized_identifier}_leak_suspected"
+        self._attr_device_class = BinarySensorDeviceClass.PROBLEM
+        self._attr_icon = "mdi:pipe-leak"
+
+    def _resolve_detection(self, flow: dict) -> bool | None:
+        return flow.get("leak_suspected")
+
+    def _resolve_attributes(self, flow: dict) -> dict:
+        return {"night_min_flow": flow.get("night_min_flow")}
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LATE_DATA_DELAY, TSDB_CACHE_MAX_DAYS_PER_METER, TSDB_CACHE_STORAGE_KEY, TSDB_CACHE_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TSDB_CACHE = "tsdb_cache"
+
+# Battery powered watermeters only upload a few times a day, so a day is only
+# considered closed once the update cycle stopped fetching it for late data
+SETTLE_DELAY = LATE_DATA_DELAY
+
+SAVE_DELAY = 30
+
+
+async def async_get_tsdb_cache(hass: HomeAssistant) -> "TsdbResponseCache":
+    """Return the TSDB response cache shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if DATA_TSDB_CACHE not in domain_data:
+        cache = TsdbResponseCache(hass)
+        domain_data[DATA_TSDB_CACHE] = cache
+        await cache.async_load()
+
+    return domain_data[DATA_TSDB_CACHE]
+
+
+class TsdbResponseCache:
+    """LRU cache of TSDB responses persisted in Home Assistant storage.
+
+    Only closed days are cached as their series never change anymore, today is
+    always fetched from the cloud. The update cycle stops fetching a day when
+    it closes, so the cache serves the backfills of the history. Only the time
+    and water of the buckets are kept, which is all a backfill reads.
+
+    Each meter has its own LRU of days, so the backfill of a home with many
+    meters does not evict the days it just cached.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_days_per_meter: int = TSDB_CACHE_MAX_DAYS_PER_METER):
+        self._store = Store(hass, TSDB_CACHE_STORAGE_VERSION, TSDB_CACHE_STORAGE_KEY)
+        self._max_days_per_meter = max_days_per_meter
+        # Cached responses of each device, from least to most recently used
+        self._entries: dict[str, OrderedDict[str, dict]] = {}
+
+    async def async_load(self) -> None:
+        """Load the cached responses from storage."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+
+        # Entries are stored from least to most recently used
+        for key, payload in stored.get("entries", []):
+            self._device_entries(key.split("|", 1)[0])[key] = self._strip(payload)
+
+        for device_identifier in self._entries:
+            self._evict(device_identifier)
+
+        _LOGGER.debug("Loaded %s cached HomeWizard TSDB responses", sum(map(len, self._entries.values())))
+
+    def get(self, device_identifier: str, day: date, granularity: str, timezone: str) -> dict | None:
+        """Return the cached response for a device and day, if any."""
+        entries = self._entries.get(device_identifier)
+        if entries is None:
+            return None
+
+        key = self._key(device_identifier, day, granularity, timezone)
+        payload = entries.get(key)
+        if payload is None:
+            return None
+
+        entries.move_to_end(key)
+        return payload
+
+    def set(self, device_identifier: str, day: date, granularity: str, timezone: str, payload: dict) -> None:
+        """Cache a response if its day is closed and its series complete."""
+        if not self.is_immutable(day, timezone, payload):
+            return
+
+        entries = self._device_entries(device_identifier)
+        key = self._key(device_identifier, day, granularity, timezone)
+        entries[key] = self._strip(payload)
+        entries.move_to_end(key)
+        self._evict(device_identifier)
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _device_entries(self, device_identifier: str) -> OrderedDict[str, dict]:
+        return self._entries.setdefault(device_identifier, OrderedDict())
+
+    def _evict(self, device_identifier: str) -> None:
+        """Drop the least recently used days of a device over the limit."""
+        entries = self._entries[device_identifier]
+        while len(entries) > self._max_days_per_meter:
+            entries.popitem(last=False)
+
+    @staticmethod
+    def is_immutable(day: date, timezone: str, payload: dict) -> bool:
+        """Tell whether the series of a day can not change anymore."""
+        values = payload.get("values") if payload else None
+        if not values:
+            return False
+
+        # A trailing null bucket means the meter did not upload the end of the day yet
+        if values[-1].get("water") is None:
+            return False
+
+        tz = dt_util.get_time_zone(timezone) or dt_util.get_default_time_zone()
+        end_of_day = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+
+        return dt_util.now(tz) >= end_of_day + SETTLE_DELAY
+
+    @staticmethod
+    def _strip(payload: dict) -> dict:
+        """Keep the time and water of the buckets, dropping the other series."""
+        return {"values": [{"time": value.get("time"), "water": value.get("water")} for value in payload.get("values", [])]}
+
+    @staticmethod
+    def _key(device_identifier: str, day: date, granularity: str, timezone: str) -> str:
+        return f"{device_identifier}|{day.isoformat()}|{granularity}|{timezone}"
+
+    def _data_to_save(self) -> dict:
+        return {"entries": [item for entries in self._entries.values() for item in entries.items()]}
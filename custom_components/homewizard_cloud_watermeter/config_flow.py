@@ -2,12 +2,29 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.loader import async_get_integration
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 
 from .api import HomeWizardCloudApi
-from .const import DOMAIN, CONF_EMAIL, CONF_PASSWORD, CONF_LOCATION_ID
+from .const import (
+    DOMAIN,
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_LOCATION_ID,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_POLLING_PROFILE,
+    CONF_ACCOUNT_DISCOVERY,
+    CONF_GRANULARITY,
+    CONF_SHORT_TERM_STATISTICS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_POLLING_PROFILE,
+    DEFAULT_ACCOUNT_DISCOVERY,
+    DEFAULT_GRANULARITY,
+    DEFAULT_SHORT_TERM_STATISTICS,
+    GRANULARITIES,
+    POLLING_PROFILES,
+)
+from .registry import async_acquire_api, async_release_api
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,33 +32,37 @@ class HomeWizardCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for HomeWizard Cloud Watermeter."""
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return HomeWizardCloudOptionsFlow()
+
     def __init__(self):
         """Initialize the flow."""
         # We store credentials and locations in the flow instance to pass between steps
         self._data = {}
         self._locations = {}
+        # Shared client of the account, released when the flow is removed
+        self._api: HomeWizardCloudApi | None = None
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step: Login."""
         errors = {}
 
         if user_input is not None:
-            session = async_get_clientsession(self.hass)
-            integration = await async_get_integration(self.hass, DOMAIN)
-
-            # Initialize our API client with user credentials
-            api = HomeWizardCloudApi(
-                user_input[CONF_EMAIL],
-                user_input[CONF_PASSWORD],
-                session,
-                integration.version,
-            )
+            self._release_api()
+
+            # Get the API client of the account with user credentials
+            self._api = await async_acquire_api(self.hass, user_input[CONF_EMAIL], user_input[CONF_PASSWORD])
 
-            if await api.async_authenticate():
+            # Always check the credentials, a token restored for the account does not prove the password
+            if await self._api.async_authenticate():
                 self._data.update(user_input)
                 # Success: go to location selection
                 return await self.async_step_location()
             else:
+                self._release_api()
                 errors["base"] = "invalid_auth"
 
         # Form schema for the UI
@@ -58,16 +79,6 @@ class HomeWizardCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle the second step: Select Location."""
         errors = {}
 
-        # We need the API again to fetch locations or validate
-        session = async_get_clientsession(self.hass)
-        integration = await async_get_integration(self.hass, DOMAIN)
-        api = HomeWizardCloudApi(
-            self._data[CONF_EMAIL],
-            self._data[CONF_PASSWORD],
-            session,
-            integration.version,
-        )
-
         if user_input is not None:
             location_id = user_input[CONF_LOCATION_ID]
             location_name = self._locations[location_id]
@@ -81,11 +92,8 @@ class HomeWizardCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 data={**self._data, "home_id": location_id}
             )
 
-        # Re-authenticate to ensure token is fresh for fetching locations
-        await api.async_authenticate()
-
-        # Fetch locations from API
-        locations_data = await api.async_get_locations()
+        # Fetch locations from API, reusing the token obtained in the first step
+        locations_data = await self._api.async_get_locations()
         if not locations_data:
             return self.async_abort(reason="no_locations")
 
@@ -101,3 +109,49 @@ class HomeWizardCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }),
             errors=errors,
         )
+
+    @callback
+    def async_remove(self) -> None:
+        """Release the API client when the flow is finished or aborted."""
+        self._release_api()
+
+    def _release_api(self) -> None:
+        if self._api is not None:
+            async_release_api(self.hass, self._api)
+            self._api = None
+
+class HomeWizardCloudOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of HomeWizard Cloud Watermeter."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_POLLING_PROFILE,
+                    default=options.get(CONF_POLLING_PROFILE, DEFAULT_POLLING_PROFILE),
+                ): vol.In(POLLING_PROFILES),
+                vol.Required(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    default=options.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                vol.Required(
+                    CONF_GRANULARITY,
+                    default=options.get(CONF_GRANULARITY, DEFAULT_GRANULARITY),
+                ): vol.In(list(GRANULARITIES)),
+                vol.Required(
+                    CONF_SHORT_TERM_STATISTICS,
+                    default=options.get(CONF_SHORT_TERM_STATISTICS, DEFAULT_SHORT_TERM_STATISTICS),
+                ): cv.boolean,
+                vol.Required(
+                    CONF_ACCOUNT_DISCOVERY,
+                    default=options.get(CONF_ACCOUNT_DISCOVERY, DEFAULT_ACCOUNT_DISCOVERY),
+                ): cv.boolean,
+            }),
+        )
@@ -1,4 +1,88 @@
+from datetime import timedelta
+
 DOMAIN = "homewizard_cloud_watermeter"
 CONF_EMAIL = "email"
 CONF_PASSWORD = "password"
 CONF_LOCATION_ID = "location_id"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+
+# Maximum number of TSDB requests running in parallel during an update cycle
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+# On-disk cache of TSDB responses for closed days, read by the history backfills
+TSDB_CACHE_STORAGE_KEY = f"{DOMAIN}.tsdb_cache"
+TSDB_CACHE_STORAGE_VERSION = 1
+# A year of hourly buckets of each meter, about 1.3 KB per day and meter
+TSDB_CACHE_MAX_DAYS_PER_METER = 366
+
+# Historical backfill of the external statistics
+SERVICE_BACKFILL_HISTORY = "backfill_history"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+BACKFILL_STORAGE_VERSION = 1
+# Number of days fetched concurrently and written to the recorder at once
+BACKFILL_CHUNK_DAYS = 7
+
+# Persisted cursor of the last imported statistic of each device
+STATISTICS_CURSOR_STORAGE_VERSION = 1
+# Imported hours compared with the cloud to catch late or corrected buckets
+RECONCILIATION_WINDOW = timedelta(hours=48)
+# Yesterday is fetched again for this long after midnight to catch its late buckets
+LATE_DATA_DELAY = timedelta(hours=12)
+
+# Persisted access token
+TOKEN_STORAGE_VERSION = 1
+
+# Snapshot of the last successful coordinator data
+SNAPSHOT_STORAGE_VERSION = 1
+
+# Polling profiles, trading data freshness for request budget
+CONF_POLLING_PROFILE = "polling_profile"
+POLLING_PROFILE_LIVE = "live"
+POLLING_PROFILE_REALTIME = "realtime"
+POLLING_PROFILE_BALANCED = "balanced"
+POLLING_PROFILE_ECONOMY = "economy"
+DEFAULT_POLLING_PROFILE = POLLING_PROFILE_BALANCED
+POLLING_PROFILES = [POLLING_PROFILE_LIVE, POLLING_PROFILE_REALTIME, POLLING_PROFILE_BALANCED, POLLING_PROFILE_ECONOMY]
+
+# Delay before the device list of a home is discovered again
+DEVICE_DISCOVERY_INTERVAL = timedelta(hours=12)
+# Device states fetched for all homes of the account are handed to the other homes refreshing within this delay
+ACCOUNT_DEVICE_STATES_MAX_AGE = timedelta(minutes=5)
+# Discover the devices of all homes of the account with a single request
+CONF_ACCOUNT_DISCOVERY = "account_discovery"
+DEFAULT_ACCOUNT_DISCOVERY = False
+SERVICE_REFRESH_DEVICES = "refresh_devices"
+
+# Timing traces of the update cycles
+TRACE_HISTORY_SIZE = 20
+SERVICE_DUMP_UPDATE_TRACES = "dump_update_traces"
+ATTR_PROFILE_NEXT_CYCLE = "profile_next_cycle"
+
+# Retries of the devices and days that failed during an update
+TSDB_RETRY_ATTEMPTS = 3
+TSDB_RETRY_DELAY = 2
+PARTIAL_RETRY_INTERVAL = timedelta(minutes=5)
+DEVICE_DISCOVERY_RETRY_INTERVAL = timedelta(minutes=15)
+
+# Width of the TSDB buckets, and import of sub-hour buckets into the short-term statistics
+CONF_GRANULARITY = "granularity"
+GRANULARITY_5M = "5m"
+GRANULARITY_15M = "15m"
+GRANULARITY_1H = "1h"
+DEFAULT_GRANULARITY = GRANULARITY_15M
+GRANULARITIES = {
+    GRANULARITY_5M: timedelta(minutes=5),
+    GRANULARITY_15M: timedelta(minutes=15),
+    GRANULARITY_1H: timedelta(hours=1),
+}
+CONF_SHORT_TERM_STATISTICS = "short_term_statistics"
+DEFAULT_SHORT_TERM_STATISTICS = False
+
+# Streaming detection of continuous flow and leaks
+CONTINUOUS_FLOW_DURATION = timedelta(hours=2)
+FLOW_MEAN_WINDOW = timedelta(hours=24)
+# Local hours of the night, when the water of a home without leak stops
+NIGHT_START_HOUR = 1
+NIGHT_END_HOUR = 5
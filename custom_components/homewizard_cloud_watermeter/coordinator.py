@@ -1,175 +1,696 @@
-from datetime import timedelta, datetime
+from collections import deque
+from contextlib import nullcontext
+from datetime import date, timedelta, datetime
+import asyncio
 import logging
+import time
 
 from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.db_schema import StatisticsShortTerm
 from homeassistant.components.recorder.models import (
-    StatisticData,
     StatisticMetaData,
     StatisticMeanType,
 )
 from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
 from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 from homeassistant.const import UnitOfVolume
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    DEFAULT_GRANULARITY,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_POLLING_PROFILE,
+    DEVICE_DISCOVERY_INTERVAL,
+    DEVICE_DISCOVERY_RETRY_INTERVAL,
+    GRANULARITIES,
+    LATE_DATA_DELAY,
+    RECONCILIATION_WINDOW,
+    PARTIAL_RETRY_INTERVAL,
+    SNAPSHOT_STORAGE_VERSION,
+    STATISTICS_CURSOR_STORAGE_VERSION,
+    TRACE_HISTORY_SIZE,
+    TSDB_RETRY_ATTEMPTS,
+    TSDB_RETRY_DELAY,
+)
+from .aggregation import (
+    HOUR,
+    RECONCILIATION_TOLERANCE,
+    SHORT_TERM_PERIOD,
+    HourlyBinner,
+    find_reconciliation_start,
+    iter_statistics,
+    rollup_bins,
+)
 from .api import HomeWizardCloudApi
+from .discovery import HomeWizardAccountDiscovery
+from .flow import FlowMonitor
+from .live import LiveDailySeries
+from .resilience import async_retry
+from .scheduler import PollingScheduler
+from .tracing import UpdateTrace
 
 _LOGGER = logging.getLogger(__name__)
 
+# Device fields that change between discoveries
+DEVICE_STATE_FIELDS = ("wifiStrength", "onlineState")
+
 class HomeWizardCloudDataUpdateCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, api: HomeWizardCloudApi, home_id: int):
+    def __init__(
+        self,
+        hass,
+        entry: ConfigEntry,
+        api: HomeWizardCloudApi,
+        home_id: int,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        polling_profile: str = DEFAULT_POLLING_PROFILE,
+        granularity: str = DEFAULT_GRANULARITY,
+        short_term_statistics: bool = False,
+        account_discovery: HomeWizardAccountDiscovery | None = None,
+    ):
         self.api = api
         self.home_id = home_id
+        # Device lists shared by all homes of the account, when enabled
+        self._account_discovery = account_discovery
+        self._force_discovery = False
         self._pending_stats = None
+        # Width of the TSDB buckets, sub-hour buckets may also feed the short-term statistics
+        self.granularity = granularity if granularity in GRANULARITIES else DEFAULT_GRANULARITY
+        bucket = GRANULARITIES[self.granularity]
+        self._short_term_statistics = short_term_statistics and bucket.total_seconds() < HOUR
+        # Adaptive refresh interval, updated after every cycle
+        self._scheduler = PollingScheduler(polling_profile, bucket)
+        self._consecutive_failures = 0
+        self._active_devices: set[str] = set()
+        self._all_offline = False
+        # Device metadata rarely changes, it is discovered on its own slow cadence
+        self._watermeters: list[dict] | None = None
+        self._watermeters_expire_at = 0.0
+        self._device_states_fresh = False
+        # Devices whose last update failed, refreshed alone before the next full cycle
+        self._retry_devices: set[str] = set()
+        self._retry_attempts = 0
+        self._retry_only = False
+        # Bound the number of TSDB requests in flight across all devices
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        # Last imported hour (UTC timestamp) and sum of each statistic, checked against the recorder once,
+        # with the usage of the recently imported hours to reconcile late data
+        self._statistics_cursors: dict[str, dict] = {}
+        self._statistics_cursors_loaded = False
+        self._validated_statistics: set[str] = set()
+        self._statistics_cursor_store = Store(hass, STATISTICS_CURSOR_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.statistics_cursors")
+        # Held while statistics are written from a cursor, and by the backfill while it shifts the sums after it
+        self.statistics_lock = asyncio.Lock()
+        # Last successful data, restored at startup before the cloud answers
+        self._snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.snapshot")
+        # Running series of today of each device, only new buckets are merged into them
+        self._live_series: dict[str, LiveDailySeries] = {}
+        # Rolling flow statistics of each device, fed with the settled buckets and fed again when they change
+        self._flow_monitors: dict[str, FlowMonitor] = {}
+        # Devices whose data changed during the last update, entities of the others skip it
+        self.changed_devices: set[str] = set()
+        # Timing traces of the last update cycles
+        self._traces: deque[UpdateTrace] = deque(maxlen=TRACE_HISTORY_SIZE)
+        self._profile_next_cycle = False
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=entry,
             name=DOMAIN,
             update_interval=timedelta(minutes=60),
+            # Listeners are only called when the data changed
+            always_update=False,
         )
 
     async def _async_update_data(self):
-        devices_data = await self.api.async_get_devices(self.home_id)
-        if not devices_data:
-            raise UpdateFailed(f"Error fetching HomeWizard devices.")
+        profile = self._profile_next_cycle
+        self._profile_next_cycle = False
+        trace = UpdateTrace(dt_util.utcnow().isoformat(), profile=profile)
+        self._traces.append(trace)
+
+        error = None
+        try:
+            data = await self._async_fetch_data(trace)
+        except Exception as err:
+            error = err
+            self._consecutive_failures += 1
+            self._schedule_next_update()
+            raise
+        except BaseException as err:
+            # Cancelled, for example by an unload
+            error = err
+            raise
+        finally:
+            # Also stops the profiler of a cancelled cycle
+            trace.finish(error)
+
+        self._consecutive_failures = 0
+        self._schedule_next_update()
 
-        if "errors" in devices_data:
-            raise UpdateFailed(f"Error fetching HomeWizard devices: {devices_data.get('errors')}")
+        return data
 
-        devices = devices_data.get("data", {}).get("home", {}).get("devices", [])
+    def get_traces(self) -> list[dict]:
+        """Return the timing traces of the last update cycles, oldest first."""
+        return [trace.as_dict() for trace in self._traces]
+
+    def async_profile_next_cycle(self) -> None:
+        """Run the next update cycle under cProfile."""
+        self._profile_next_cycle = True
+
+    def _schedule_next_update(self) -> None:
+        """Adapt the interval before the next refresh to the current state."""
+        interval = self._scheduler.next_interval(
+            dt_util.now(),
+            active=bool(self._active_devices),
+            offline=self._all_offline,
+            failures=self._consecutive_failures,
+        )
 
-        now = dt_util.now()
-        yesterday = now - timedelta(days=1)
+        # Retry the devices that failed sooner, backing off while they keep failing
+        retry_interval = PARTIAL_RETRY_INTERVAL * 2 ** max(self._retry_attempts - 1, 0)
+        self._retry_only = bool(self._retry_devices) and not self._consecutive_failures and retry_interval < interval
 
-        data = {}
+        self.update_interval = retry_interval if self._retry_only else interval
+        _LOGGER.debug(
+            "Next HomeWizard refresh in %s%s",
+            self.update_interval,
+            f", for {len(self._retry_devices)} failed device(s) only" if self._retry_only else "",
+        )
 
-        # Find watermeter devices and fetch their data
-        for device in devices:
-            if device.get("type") != "watermeter":
-                continue
+    async def _async_fetch_data(self, trace: UpdateTrace):
+        with trace.phase("token"):
+            await self.api.async_ensure_token()
 
-            _LOGGER.debug("Found HomeWizard watermeter device '%s', fetching data.", device["identifier"])
+        with trace.phase("discovery"):
+            watermeters = await self._async_get_watermeters()
 
-            # Sanitize the identifier for Home Assistant's use
-            # This will be used for statistic_id, unique_id, and device_id
-            device['sanitized_identifier'] = device["identifier"].replace('/', '_')
+        # A retry cycle only refetches the devices that failed, the others keep their data
+        previous = self.data or {}
+        retry_only = self._retry_only and bool(previous)
+        self._retry_only = False
 
-            # Retrieve device data
-            stats_today = await self.api.async_get_tsdb_data(now, self.hass.config.time_zone, device["identifier"])
+        if retry_only:
+            targets = [device for device in watermeters if device["identifier"] in self._retry_devices]
+        else:
+            targets = watermeters
 
-            if not stats_today or "values" not in stats_today:
-                _LOGGER.warning("No data received for watermeter device.")
-                continue
+        identifiers = [device["identifier"] for device in targets]
+
+        now = dt_util.now()
+        yesterday = now - timedelta(days=1)
+
+        with_recorder = "recorder" in self.hass.config.components
 
-            if "recorder" in self.hass.config.components:
-                stats_yesterday = await self.api.async_get_tsdb_data(yesterday, self.hass.config.time_zone, device["identifier"])
+        # Retrieve the data of all devices with one request per day, today and yesterday in parallel
+        if with_recorder:
+            with trace.phase("statistics_cursors"):
+                await self._async_validate_statistics_cursors(targets)
 
-                if not stats_yesterday or not stats_yesterday or "values" not in stats_today or "values" not in stats_yesterday:
-                    _LOGGER.warning("No yesterday data received for watermeter device.")
-                    continue
+            # Yesterday is only needed until an hour of today has been imported
+            midnight = dt_util.start_of_local_day(now)
+            yesterday_identifiers = [
+                device["identifier"] for device in targets if self._needs_yesterday(device, midnight)
+            ]
 
-                combined_values = stats_yesterday.get("values", []) + stats_today.get("values", [])
+            stats_today, stats_yesterday, _ = await asyncio.gather(
+                self._async_timed(trace, "tsdb_today", self.async_get_tsdb_data_batch(now, identifiers)),
+                self._async_timed(trace, "tsdb_yesterday", self.async_get_tsdb_data_batch(yesterday, yesterday_identifiers)),
+                self._async_timed(trace, "device_states", self._async_refresh_device_states(watermeters, retry_only)),
+            )
+        else:
+            yesterday_identifiers = []
+            stats_today, _ = await asyncio.gather(
+                self._async_timed(trace, "tsdb_today", self.async_get_tsdb_data_batch(now, identifiers)),
+                self._async_timed(trace, "device_states", self._async_refresh_device_states(watermeters, retry_only)),
+            )
+            stats_yesterday = {}
 
-                try:
-                    await self.async_inject_cleaned_stats(combined_values, device)
-                except Exception as err:
-                    _LOGGER.error("Failed to inject HomeWizard statistics: %s", err)
-            else:
-                _LOGGER.debug("Recorder not loaded, skipping HomeWizard statistics injection")
+        # Nothing new can be expected while every watermeter is offline
+        self._all_offline = bool(watermeters) and all(
+            str(device.get("onlineState", "")).lower() == "offline" for device in watermeters
+        )
 
-            daily_total = sum(
-                float(v.get("water") or 0)
-                for v in stats_today.get("values", [])
+        failed: set[str] = set()
+
+        # Process all devices concurrently, a failing device must not delay or drop the others
+        with trace.phase("devices"):
+            results = await asyncio.gather(
+                *(
+                    self._async_update_device(
+                        device,
+                        now.date(),
+                        stats_today.get(device["identifier"]),
+                        stats_yesterday.get(device["identifier"]),
+                        with_recorder,
+                        device["identifier"] in yesterday_identifiers,
+                        failed,
+                        trace,
+                    )
+                    for device in targets
+                ),
+                return_exceptions=True,
             )
 
-            data[device['sanitized_identifier']] = ({
-                "daily_total": daily_total,
-                "unit": UnitOfVolume.LITERS,
-                "device": device,
-            })
+        target_identifiers = set(identifiers)
+        data = {
+            device["sanitized_identifier"]: previous[device["sanitized_identifier"]]
+            for device in watermeters
+            if device["identifier"] not in target_identifiers and device["sanitized_identifier"] in previous
+        }
+        for device, result in zip(targets, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Failed to update HomeWizard watermeter device '%s': %s", device["identifier"], result)
+                result = None
+
+            if result is None:
+                failed.add(device["identifier"])
+                # Keep the last good data until the device is retried
+                result = previous.get(device["sanitized_identifier"])
+
+            if result is not None:
+                data[device['sanitized_identifier']] = result
+
+        if failed:
+            _LOGGER.warning("Update of %s HomeWizard watermeter(s) failed, retrying them sooner", len(failed))
+            self._retry_attempts += 1
+        else:
+            self._retry_attempts = 0
+        self._retry_devices = (self._retry_devices - target_identifiers) | failed
+
+        self.changed_devices = {
+            sanitized_identifier
+            for sanitized_identifier, value in data.items()
+            if previous.get(sanitized_identifier) != value
+        }
+
+        self._snapshot_store.async_delay_save(
+            lambda: {"date": now.date().isoformat(), "data": data},
+            10,
+        )
 
         return data
 
-    async def async_inject_cleaned_stats(self, values: list, device: dict):
-        """Clean data and inject into HA statistics with daily block handling."""
-        statistic_id = f"{DOMAIN}:{device['sanitized_identifier']}_total"
+    @staticmethod
+    async def _async_timed(trace: UpdateTrace, name: str, awaitable):
+        """Await a coroutine as a phase of the trace."""
+        with trace.phase(name):
+            return await awaitable
+
+    async def _async_get_watermeters(self) -> list[dict]:
+        """Return the watermeters of the home, discovering them when the cache is stale."""
+        if self._watermeters is not None and time.monotonic() < self._watermeters_expire_at:
+            return self._watermeters
+
+        if self._account_discovery is not None:
+            devices_data = await self._account_discovery.async_get_devices(self.home_id, self._force_discovery)
+        else:
+            devices_data = await self.api.async_get_devices(self.home_id)
+        self._force_discovery = False
+
+        if not devices_data or "errors" in devices_data:
+            if self._watermeters is not None:
+                # The known devices are still valid, discover them again later
+                _LOGGER.warning("Error fetching HomeWizard devices, keeping the known ones.")
+                self._watermeters_expire_at = time.monotonic() + DEVICE_DISCOVERY_RETRY_INTERVAL.total_seconds()
+                return self._watermeters
+
+            if not devices_data:
+                raise UpdateFailed(f"Error fetching HomeWizard devices.")
 
-        # Get the absolute last point in history to ensure continuity
-        last_stats = await get_instance(self.hass).async_add_executor_job(
-            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
-        )
+            raise UpdateFailed(f"Error fetching HomeWizard devices: {devices_data.get('errors')}")
 
-        last_sum = 0.0
-        last_stat_time = None
+        devices = devices_data.get("data", {}).get("home", {}).get("devices", [])
 
-        if statistic_id in last_stats and last_stats[statistic_id]:
-            point = last_stats[statistic_id][0]
-            last_sum = point.get("sum") or 0.0
+        watermeters = [device for device in devices if device.get("type") == "watermeter"]
 
-            raw_start = point.get("start")
-            if raw_start is not None:
-                if isinstance(raw_start, (int, float)):
-                    last_stat_time = dt_util.utc_from_timestamp(raw_start)
-                else:
-                    last_stat_time = dt_util.as_utc(raw_start)
+        for device in watermeters:
+            # Sanitize the identifier for Home Assistant's use
+            # This will be used for statistic_id, unique_id, and device_id
+            device['sanitized_identifier'] = device["identifier"].replace('/', '_')
 
-        metadata = StatisticMetaData(
-            has_sum=True,
-            name=f"{device.get('name')} Total",
-            source=DOMAIN,
-            statistic_id=statistic_id,
-            unit_of_measurement=UnitOfVolume.LITERS,
-            unit_class=SensorDeviceClass.VOLUME,
-            mean_type=StatisticMeanType.NONE,
+        _LOGGER.debug("Discovered %s HomeWizard watermeter(s)", len(watermeters))
+
+        self._watermeters = watermeters
+        self._watermeters_expire_at = time.monotonic() + DEVICE_DISCOVERY_INTERVAL.total_seconds()
+        # The discovery query already returned fresh states, the account discovery keeps track of them itself
+        self._device_states_fresh = self._account_discovery is None
+
+        return watermeters
+
+    async def _async_refresh_device_states(self, watermeters: list[dict], skip: bool = False) -> None:
+        """Update the volatile fields of the devices with the lighter state query."""
+        if skip:
+            return
+
+        if self._device_states_fresh:
+            self._device_states_fresh = False
+            return
+
+        if self._account_discovery is not None:
+            # One query for all homes of the account
+            states_data = await self._account_discovery.async_get_device_states(self.home_id)
+        else:
+            states_data = await self.api.async_get_device_states(self.home_id)
+        if not states_data or "errors" in states_data:
+            # Keep the previous states, they are only informative
+            _LOGGER.warning("Error fetching HomeWizard device states, keeping the previous ones.")
+            return
+
+        states = {
+            state["identifier"]: state
+            for state in (states_data.get("data") or {}).get("home", {}).get("devices", [])
+            if "identifier" in state
+        }
+
+        for device in watermeters:
+            state = states.get(device["identifier"])
+            if state is None:
+                continue
+
+            for field in DEVICE_STATE_FIELDS:
+                if field in state:
+                    device[field] = state[field]
+
+    def async_request_discovery(self) -> None:
+        """Discover the devices of the home again on the next update."""
+        self._watermeters_expire_at = 0
+        # Bypass the device lists shared by the account
+        self._force_discovery = True
+        # A requested update refreshes every device
+        self._retry_only = False
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the data of the last successful update, if any."""
+        snapshot = await self._snapshot_store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return False
+
+        data = snapshot["data"]
+
+        # The daily total of a previous day is meaningless today
+        if snapshot.get("date") != dt_util.now().date().isoformat():
+            for value in data.values():
+                value["daily_total"] = None
+
+        self.data = data
+        self.changed_devices = set(data)
+        _LOGGER.debug("Restored HomeWizard data of %s device(s) from the last run", len(data))
+
+        return True
+
+    async def _async_update_device(self, device: dict, today: date, stats_today: dict | None, stats_yesterday: dict | None, with_recorder: bool, needs_yesterday: bool, failed: set[str], trace: UpdateTrace | None = None) -> dict | None:
+        """Process the data of a single watermeter device and inject its statistics.
+
+        Returns None when today is missing. Devices whose statistics could not be
+        imported are added to failed, their sensors are still updated.
+        """
+        _LOGGER.debug("Found HomeWizard watermeter device '%s', processing data.", device["identifier"])
+
+        if not stats_today or "values" not in stats_today:
+            _LOGGER.warning("No data received for watermeter device.")
+            return None
+
+        today_values = stats_today["values"]
+        import_statistics = with_recorder
+
+        if with_recorder and needs_yesterday and (not stats_yesterday or "values" not in stats_yesterday):
+            # Importing today alone would move the cursor past the missing hours of yesterday
+            _LOGGER.warning("No yesterday data received for watermeter device, statistics will be imported on retry.")
+            failed.add(device["identifier"])
+            import_statistics = False
+
+        # Today only merges the buckets not seen yet, and is reset at local midnight
+        series = self._live_series.get(device["identifier"])
+        if series is None or series.day != today:
+            series = self._live_series[device["identifier"]] = LiveDailySeries(today, self.create_statistics_binner)
+
+        with trace.phase("aggregation", device["identifier"]) if trace else nullcontext():
+            daily_total = series.update(today_values)
+
+            monitor = self._flow_monitors.get(device["identifier"])
+            if monitor is None:
+                monitor = self._flow_monitors[device["identifier"]] = FlowMonitor(
+                    GRANULARITIES[self.granularity].total_seconds()
+                )
+            monitor.update(today, today_values, series.changed_from)
+
+            binner = series.binner
+            if import_statistics and needs_yesterday:
+                binner = self.create_statistics_binner()
+                binner.add(stats_yesterday["values"])
+                # Hours of a half-hour timezone may span midnight
+                for start, usage in series.binner.bins.items():
+                    binner.bins[start] = binner.bins.get(start, 0.0) + usage
+
+        if import_statistics:
+            try:
+                await self.async_inject_cleaned_stats(binner, device, trace)
+            except Exception as err:
+                _LOGGER.error("Failed to inject HomeWizard statistics: %s", err)
+                failed.add(device["identifier"])
+        elif not with_recorder:
+            _LOGGER.debug("Recorder not loaded, skipping HomeWizard statistics injection")
+
+        # Water is being used if the last known bucket is not empty
+        last_usage = next(
+            (v["water"] for v in reversed(today_values) if v.get("water") is not None),
+            None,
+        )
+        if last_usage:
+            self._active_devices.add(device['sanitized_identifier'])
+        else:
+            self._active_devices.discard(device['sanitized_identifier'])
+
+        return {
+            "daily_total": daily_total,
+            "unit": UnitOfVolume.LITERS,
+            "flow": monitor.as_dict(),
+            # The device is updated in place by the next cycles, keep a copy to detect changes
+            "device": dict(device),
+        }
+
+    def _needs_yesterday(self, device: dict, midnight: datetime) -> bool:
+        """Tell whether yesterday may still hold hours that are not imported, or late data."""
+        cursor = self._statistics_cursors.get(self.get_statistic_id(device))
+        if cursor is None:
+            return True
+
+        if cursor["start"] < midnight.timestamp():
+            return True
+
+        return dt_util.now() < midnight + LATE_DATA_DELAY
+
+    async def _async_validate_statistics_cursors(self, devices: list[dict]) -> None:
+        """Check the cursors of new statistics against the recorder."""
+        if not self._statistics_cursors_loaded:
+            self._statistics_cursors = (await self._statistics_cursor_store.async_load()) or {}
+            self._statistics_cursors_loaded = True
+
+        statistic_ids = [
+            self.get_statistic_id(device)
+            for device in devices
+            if self.get_statistic_id(device) not in self._validated_statistics
+        ]
+        if not statistic_ids:
+            return
+
+        # A single executor job for all the statistics
+        cursors = await get_instance(self.hass).async_add_executor_job(
+            self._get_last_statistics_cursors, statistic_ids
         )
 
-        hourly_data = {}
-        for entry in values:
-            # Ignore nulls (mainly future hours)
-            if entry.get("water") is None:
+        for statistic_id in statistic_ids:
+            cursor = cursors.get(statistic_id)
+            stored = self._statistics_cursors.get(statistic_id)
+
+            if cursor is None:
+                self._statistics_cursors.pop(statistic_id, None)
+            elif stored is None or stored["start"] != cursor["start"]:
+                # The imported hours can not be trusted anymore, only the last one is known from the recorder
+                _LOGGER.debug("Statistics cursor of %s reset from the recorder: %s", statistic_id, cursor)
+                self._statistics_cursors[statistic_id] = cursor
+            elif abs(stored["sum"] - cursor["sum"]) > RECONCILIATION_TOLERANCE:
+                # Earlier sums were shifted, e.g. by a backfill, the usage of the imported hours still holds
+                _LOGGER.debug("Statistics cursor of %s rebased on the recorder sum %s", statistic_id, cursor["sum"])
+                stored["sum"] = cursor["sum"]
+
+            self._validated_statistics.add(statistic_id)
+
+        self._statistics_cursor_store.async_delay_save(lambda: self._statistics_cursors, 10)
+
+    def _get_last_statistics_cursors(self, statistic_ids: list[str]) -> dict[str, dict]:
+        """Read the last imported hour, with its usage and sum, of statistics from the recorder."""
+        cursors = {}
+
+        for statistic_id in statistic_ids:
+            last_stats = get_last_statistics(self.hass, 1, statistic_id, True, {"state", "sum"})
+            if not last_stats.get(statistic_id):
                 continue
 
-            time = dt_util.parse_datetime(entry["time"])
-            if not time:
+            point = last_stats[statistic_id][0]
+            raw_start = point.get("start")
+            if raw_start is None:
                 continue
 
-            hour_timestamp = time.replace(minute=0, second=0, microsecond=0)
+            if not isinstance(raw_start, (int, float)):
+                raw_start = dt_util.as_utc(raw_start).timestamp()
 
-            # Security: don't process data far in the future
-            if hour_timestamp > dt_util.now() + timedelta(hours=1):
-                continue
+            cursors[statistic_id] = {"start": raw_start, "sum": point.get("sum") or 0.0}
+            # The state of a row is the usage of its hour, so a partial hour can still grow
+            if point.get("state") is not None:
+                cursors[statistic_id]["hours"] = {str(int(raw_start)): point["state"]}
 
-            if hour_timestamp not in hourly_data:
-                hourly_data[hour_timestamp] = 0.0
-            hourly_data[hour_timestamp] += float(entry["water"])
+        return cursors
 
-        # Build statistics starting from the last known sum
-        stat_data = []
-        cumulative_sum = last_sum
+    def shift_statistics_cursor(self, statistic_id: str, after: datetime, shift: float) -> None:
+        """Follow a shift of the sums of a statistic from the given time on.
 
-        for hour in sorted(hourly_data.keys()):
-            hour_utc = dt_util.as_utc(hour)
+        A cursor before that time points to an hour rewritten by a backfill, it
+        is read again from the recorder on the next update.
+        """
+        cursor = self._statistics_cursors.get(statistic_id)
+        if cursor is None or cursor["start"] < after.timestamp():
+            self._validated_statistics.discard(statistic_id)
+            return
 
-            if last_stat_time and hour_utc <= last_stat_time:
-                continue
+        # The usage of the imported hours did not change, only the sum they start from
+        cursor["sum"] += shift
+        self._statistics_cursor_store.async_delay_save(lambda: self._statistics_cursors, 10)
 
-            usage = hourly_data[hour]
+    async def async_get_tsdb_data_batch(self, date: datetime, device_identifiers: list[str], granularity: str | None = None) -> dict:
+        """Fetch time-series data of several devices, keyed by device identifier.
 
-            # Ignore hours without water usage
-            if usage == 0:
-                continue
+        The buckets have the configured width unless another granularity is given.
+        """
+        granularity = granularity or self.granularity
+        payloads = {}
 
-            cumulative_sum += usage
+        if len(device_identifiers) > 1 and self.api.tsdb_batch_supported:
+            async with self._request_semaphore:
+                payloads = await self.api.async_get_tsdb_data_batch(date, self.hass.config.time_zone, device_identifiers, granularity) or {}
 
-            stat_data.append(
-                StatisticData(
-                    start=hour,
-                    state=usage,
-                    sum=cumulative_sum
-                )
-            )
+            # Only the devices missing from the batch are fetched again
+            device_identifiers = [identifier for identifier in device_identifiers if not payloads.get(identifier)]
+
+        # Fall back to one request per device
+        retried = await asyncio.gather(
+            *(self._async_get_tsdb_data(date, identifier, granularity) for identifier in device_identifiers)
+        )
 
-        if stat_data:
-            async_add_external_statistics(self.hass, metadata, stat_data)
\ No newline at end of file
+        return {**payloads, **dict(zip(device_identifiers, retried))}
+
+    async def _async_get_tsdb_data(self, date: datetime, device_identifier: str, granularity: str) -> dict | None:
+        """Fetch time-series data, bounded by the concurrency limit and retried on failure."""
+        async def async_fetch():
+            async with self._request_semaphore:
+                return await self.api.async_get_tsdb_data(date, self.hass.config.time_zone, device_identifier, granularity)
+
+        # Give up as soon as the circuit of the TSDB host opens
+        return await async_retry(
+            async_fetch,
+            TSDB_RETRY_ATTEMPTS,
+            TSDB_RETRY_DELAY,
+            lambda: self.api.is_available("tsdb"),
+        )
+
+    async def async_inject_cleaned_stats(self, binner: HourlyBinner, device: dict, trace: UpdateTrace | None = None):
+        """Inject the binned data into HA statistics, continuing from the last imported hour.
+
+        Hours of the reconciliation window whose usage changed in the cloud are
+        imported again, along with the tail of statistics after them.
+        """
+        async with self.statistics_lock:
+            await self._async_inject_cleaned_stats(binner, device, trace)
+
+    async def _async_inject_cleaned_stats(self, binner: HourlyBinner, device: dict, trace: UpdateTrace | None):
+        statistic_id = self.get_statistic_id(device)
+        identifier = device["identifier"]
+
+        if statistic_id not in self._validated_statistics:
+            # A backfill rewrote the hour of the cursor since the start of the cycle
+            await self._async_validate_statistics_cursors([device])
+
+        # Continue from the last imported point to ensure continuity
+        cursor = self._statistics_cursors.get(statistic_id)
+
+        last_sum = 0.0
+        last_stat_time = None
+        imported = {}
+
+        if cursor is not None:
+            last_sum = cursor["sum"]
+            last_stat_time = cursor["start"]
+            imported = {int(start): usage for start, usage in cursor.get("hours", {}).items()}
+
+        short_term_data = []
+
+        with trace.phase("aggregation", identifier) if trace else nullcontext():
+            hourly_bins = rollup_bins(binner.bins) if binner.period < HOUR else binner.bins
+
+            earliest, base_sum = find_reconciliation_start(hourly_bins, imported, last_stat_time, last_sum)
+            if earliest is None:
+                return
+
+            if last_stat_time is not None and earliest <= last_stat_time:
+                _LOGGER.debug("Late HomeWizard data for %s, importing again from %s", statistic_id, dt_util.utc_from_timestamp(earliest))
+
+            # Hours of the tail missing from the fetched data keep their imported usage
+            tail = {start: usage for start, usage in imported.items() if start >= earliest}
+            tail.update((start, usage) for start, usage in hourly_bins.items() if start >= earliest)
+
+            # Build statistics starting from the sum before the earliest change
+            stat_data = list(iter_statistics(tail, base_sum))
+
+            if binner.period < HOUR:
+                # Short-term rows of the same hours, sharing their cumulative sum
+                short_term_data = list(iter_statistics(
+                    {start: usage for start, usage in binner.bins.items() if start >= earliest},
+                    base_sum,
+                ))
+
+        with trace.phase("statistics_import", identifier) if trace else nullcontext():
+            metadata = self.build_statistic_metadata(device)
+            async_add_external_statistics(self.hass, metadata, stat_data)
+
+            if short_term_data:
+                # External statistics have no public short-term import, queue it to the recorder directly
+                get_instance(self.hass).async_import_statistics(metadata, short_term_data, StatisticsShortTerm)
+
+        last_start = stat_data[-1]["start"].timestamp()
+        window_start = last_start - RECONCILIATION_WINDOW.total_seconds()
+        imported.update(tail)
+
+        self._statistics_cursors[statistic_id] = {
+            "start": last_start,
+            "sum": stat_data[-1]["sum"],
+            "hours": {str(start): usage for start, usage in imported.items() if start > window_start},
+        }
+        self._statistics_cursor_store.async_delay_save(lambda: self._statistics_cursors, 10)
+
+    def create_hourly_binner(self, period: int = HOUR) -> HourlyBinner:
+        """Create an hourly binner in the timezone of the TSDB requests."""
+        return HourlyBinner(dt_util.get_time_zone(self.hass.config.time_zone), period=period)
+
+    def create_statistics_binner(self) -> HourlyBinner:
+        """Create a binner with the period of the statistics imported by the update cycle."""
+        return self.create_hourly_binner(SHORT_TERM_PERIOD if self._short_term_statistics else HOUR)
+
+    @staticmethod
+    def get_statistic_id(device: dict) -> str:
+        """Return the external statistic id of a device."""
+        return f"{DOMAIN}:{device['sanitized_identifier']}_total"
+
+    def build_statistic_metadata(self, device: dict) -> StatisticMetaData:
+        """Build the metadata of the external statistic of a device."""
+        return StatisticMetaData(
+            has_sum=True,
+            name=f"{device.get('name')} Total",
+            source=DOMAIN,
+            statistic_id=self.get_statistic_id(device),
+            unit_of_measurement=UnitOfVolume.LITERS,
+            unit_class=SensorDeviceClass.VOLUME,
+            mean_type=StatisticMeanType.NONE,
+        )
@@ -0,0 +1,32 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_EMAIL, CONF_PASSWORD
+
+TO_REDACT = {CONF_EMAIL, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics of a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["coordinator"]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "home_id": coordinator.home_id,
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "devices": len(coordinator.data or {}),
+        },
+        # The API client, and thus its metrics, is shared by all homes of the account
+        "api_metrics": data["api"].metrics.as_dict(),
+        "circuit_breakers": {
+            endpoint: breaker.as_dict() for endpoint, breaker in data["api"].circuit_breakers.items()
+        },
+        "update_traces": coordinator.get_traces(),
+    }
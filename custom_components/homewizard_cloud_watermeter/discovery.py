@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+
+from .api import HomeWizardCloudApi
+from .const import ACCOUNT_DEVICE_STATES_MAX_AGE, DEVICE_DISCOVERY_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HomeWizardAccountDiscovery:
+    """Discover the devices of all homes of an account with a single request.
+
+    The homes come from the locations of the account, and their device lists
+    are fetched with one aliased GraphQL query. The result is shared by the
+    coordinators of the account until it expires, so discovery costs the same
+    whatever the number of homes.
+
+    The device states of every cycle are fetched the same way: the first home
+    to refresh queries the states of all homes, and the others, which refresh
+    just after the same bucket boundaries, each take their own part once.
+    """
+
+    def __init__(self, api: HomeWizardCloudApi):
+        self._api = api
+        self._lock = asyncio.Lock()
+        self._devices: dict[int, dict] = {}
+        self._expire_at = 0.0
+        # States of each home not handed out yet, with the time they were fetched
+        self._states: dict[int, tuple[float, dict]] = {}
+
+    async def async_get_devices(self, home_id: int, force: bool = False) -> dict | None:
+        """Return the device list of a home, in the format of HomeWizardCloudApi.async_get_devices."""
+        async with self._lock:
+            if force or home_id not in self._devices or time.monotonic() >= self._expire_at:
+                await self._async_discover(home_id)
+
+            return self._devices.get(home_id)
+
+    async def async_get_device_states(self, home_id: int) -> dict | None:
+        """Return the device states of a home, in the format of HomeWizardCloudApi.async_get_device_states."""
+        async with self._lock:
+            fetched_at, states = self._states.pop(home_id, (0.0, None))
+            if states is not None and time.monotonic() < fetched_at + ACCOUNT_DEVICE_STATES_MAX_AGE.total_seconds():
+                return states
+
+            home_ids = set(self._devices)
+            home_ids.add(home_id)
+
+            states = await self._api.async_get_device_states_of_homes(sorted(home_ids))
+            if states is None:
+                return None
+
+            self._share_states(states)
+
+            return self._states.pop(home_id)[1]
+
+    def _share_states(self, states: dict[int, dict]) -> None:
+        """Keep the states of every home until each home takes them."""
+        fetched_at = time.monotonic()
+        self._states = {home_id: (fetched_at, home_states) for home_id, home_states in states.items()}
+
+    async def _async_discover(self, home_id: int) -> None:
+        locations = await self._api.async_get_locations()
+        home_ids = {location["id"] for location in locations if "id" in location}
+        # The home being set up is always discovered, even if the locations failed
+        home_ids.add(home_id)
+
+        devices = await self._api.async_get_devices_of_homes(sorted(home_ids))
+        if devices is None:
+            # Forget the previous result so the failure reaches the coordinator
+            self._devices.pop(home_id, None)
+            return
+
+        _LOGGER.debug("Discovered the devices of %s HomeWizard home(s) in one request", len(devices))
+
+        self._devices = devices
+        self._expire_at = time.monotonic() + DEVICE_DISCOVERY_INTERVAL.total_seconds()
+        # The device lists hold the states too, no state query is needed right after
+        self._share_states(devices)
@@ -0,0 +1,136 @@
+from collections import deque
+from datetime import date
+
+from .const import (
+    CONTINUOUS_FLOW_DURATION,
+    FLOW_MEAN_WINDOW,
+    NIGHT_END_HOUR,
+    NIGHT_START_HOUR,
+)
+
+
+class FlowMonitor:
+    """Rolling flow statistics of a device, updated as its buckets settle.
+
+    The last bucket with a value may still be filling, so a bucket is only
+    fed once a later one arrived, or once the day is over. Each bucket
+    updates the statistics in O(1): a ring buffer with a running sum gives
+    the mean flow of the last window, a counter of consecutive buckets with
+    usage detects continuous flow, and a running minimum over the night
+    buckets tells whether the water ever stopped during the last night, the
+    usual sign of a leak when it did not.
+
+    The cloud interpolates the buckets between two uploads of the watermeter,
+    so buckets already fed may be rewritten later. The state at the start of
+    the day is kept, and the buckets of the day are fed again from it when
+    one of them changed.
+    """
+
+    def __init__(self, bucket_seconds: float):
+        self._bucket_hours = bucket_seconds / 3600
+        self._continuous_buckets = max(1, round(CONTINUOUS_FLOW_DURATION.total_seconds() / bucket_seconds))
+        # Flows (L/h) of the last buckets
+        self._window: deque[float] = deque(maxlen=max(1, round(FLOW_MEAN_WINDOW.total_seconds() / bucket_seconds)))
+        self._window_sum = 0.0
+        self.consecutive = 0
+        self._night_min: float | None = None
+        self.last_night_min: float | None = None
+        self._day: date | None = None
+        # Position in the day of the first bucket not fed yet, and its time and water
+        self._position = 0
+        self._pending: tuple[str, float] | None = None
+        self._day_start = self._get_state()
+
+    def update(self, day: date, values: list[dict], changed_from: int | None = None) -> None:
+        """Feed the buckets of the day that settled since the last update.
+
+        changed_from is the first position whose water changed since the last
+        update, as found by LiveDailySeries. Unless it is None, buckets fed
+        from it on are fed again.
+        """
+        if day != self._day:
+            # The last bucket of the previous day is complete now
+            if self._pending is not None:
+                self._push(*self._pending)
+            self._day = day
+            self._position = 0
+            self._pending = None
+            self._day_start = self._get_state()
+        elif changed_from is not None and changed_from < self._position:
+            # Feed the day again, the statistics can not be rewound bucket by bucket
+            self._set_state(self._day_start)
+            self._position = 0
+            self._pending = None
+
+        last = len(values) - 1
+        while last >= 0 and values[last].get("water") is None:
+            last -= 1
+
+        for index in range(self._position, last):
+            entry = values[index]
+            self._push(entry.get("time"), entry.get("water"))
+
+        if last >= self._position:
+            self._position = last
+            self._pending = (values[last].get("time"), values[last]["water"])
+
+    def _get_state(self) -> tuple:
+        return tuple(self._window), self._window_sum, self.consecutive, self._night_min, self.last_night_min
+
+    def _set_state(self, state: tuple) -> None:
+        window, self._window_sum, self.consecutive, self._night_min, self.last_night_min = state
+        self._window = deque(window, maxlen=self._window.maxlen)
+
+    def _push(self, raw: str | None, water) -> None:
+        if water is None:
+            # A missing bucket breaks the continuity
+            self.consecutive = 0
+            return
+
+        flow = float(water) / self._bucket_hours
+
+        window = self._window
+        if len(window) == window.maxlen:
+            self._window_sum -= window[0]
+        window.append(flow)
+        self._window_sum += flow
+
+        self.consecutive = self.consecutive + 1 if flow > 0 else 0
+
+        hour = raw[11:13] if isinstance(raw, str) else ""
+        if not hour.isdigit():
+            return
+
+        if NIGHT_START_HOUR <= int(hour) < NIGHT_END_HOUR:
+            self._night_min = flow if self._night_min is None else min(self._night_min, flow)
+        elif self._night_min is not None:
+            # The night is over
+            self.last_night_min = self._night_min
+            self._night_min = None
+
+    @property
+    def continuous_flow(self) -> bool:
+        return self.consecutive >= self._continuous_buckets
+
+    @property
+    def leak_suspected(self) -> bool | None:
+        """Tell whether the water never stopped during the last night, None before a night was seen."""
+        if self.last_night_min is None:
+            return None
+        return self.last_night_min > 0
+
+    @property
+    def mean_flow(self) -> float | None:
+        if not self._window:
+            return None
+        return max(self._window_sum, 0.0) / len(self._window)
+
+    def as_dict(self) -> dict:
+        mean_flow = self.mean_flow
+        return {
+            "continuous_flow": self.continuous_flow,
+            "continuous_flow_minutes": round(self.consecutive * self._bucket_hours * 60),
+            "leak_suspected": self.leak_suspected,
+            "night_min_flow": None if self.last_night_min is None else round(self.last_night_min, 3),
+            "mean_flow": None if mean_flow is None else round(mean_flow, 3),
+        }
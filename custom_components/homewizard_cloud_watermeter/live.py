@@ -0,0 +1,81 @@
+from collections.abc import Callable
+from datetime import date
+import time
+
+from .aggregation import HourlyBinner
+
+
+class LiveDailySeries:
+    """Running daily series of a device, merging only the buckets that changed.
+
+    The TSDB returns the whole day on every request, with one entry per
+    bucket. The series remembers the water merged for each position and
+    checks that its last bucket is still at the same position. Only new
+    buckets, and the ones the cloud filled in or corrected since, go through
+    the binner, as deltas. The daily total and the bins are thus updated in
+    O(changed buckets), instead of parsing and summing the whole day again.
+    """
+
+    def __init__(self, day: date, create_binner: Callable[[], HourlyBinner]):
+        self.day = day
+        self._create_binner = create_binner
+        self.binner = create_binner()
+        self.total = 0.0
+        # First position whose water changed during the last update, None when nothing changed
+        self.changed_from: int | None = None
+        self._last_time: str | None = None
+        # Water merged for each bucket of the day, by position
+        self._merged: list[float | None] = []
+
+    def update(self, values: list[dict], now: float | None = None) -> float:
+        """Merge the changed buckets of the day and return the daily total."""
+        self.binner.set_now(time.time() if now is None else now)
+        self.changed_from = None
+
+        merged = self._merged
+        count = len(merged)
+        if count > len(values) or (count and values[count - 1].get("time") != self._last_time):
+            # The series does not line up anymore, start the day again
+            self._reset()
+            merged = self._merged
+            count = 0
+            self.changed_from = 0
+
+        deltas = []
+        for index, entry in enumerate(values):
+            water = entry.get("water")
+            if water is None:
+                if index >= count:
+                    merged.append(None)
+                elif merged[index] is not None:
+                    # The cloud dropped the value of the bucket, take its water back
+                    deltas.append({"time": entry["time"], "water": -merged[index]})
+                    merged[index] = None
+                    if self.changed_from is None:
+                        self.changed_from = index
+                continue
+
+            water = float(water)
+            previous = merged[index] if index < count else None
+            if previous is None or water != previous:
+                # New buckets are added even without usage, so their hour gets a bin
+                deltas.append({"time": entry["time"], "water": water - (previous or 0.0)})
+                if self.changed_from is None:
+                    self.changed_from = index
+
+            if index < count:
+                merged[index] = water
+            else:
+                merged.append(water)
+
+        if deltas:
+            self.total += self.binner.add(deltas)
+
+        self._last_time = values[-1].get("time") if values else None
+
+        return self.total
+
+    def _reset(self) -> None:
+        self.binner = self._create_binner()
+        self.total = 0.0
+        self._merged = []
@@ -0,0 +1,118 @@
+import bisect
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+ENDPOINTS = ("auth", "locations", "graphql", "tsdb")
+
+
+class EndpointMetrics:
+    """Request counters and latency histogram of an endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        # Size of the bodies on the wire, before decompression
+        self.bytes_transferred = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_status: int | None = None
+        # One more bucket for latencies above the last bound
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency: float, status: int | None, size: int, transferred: int | None = None) -> None:
+        """Record a request, latency being in seconds and status None on exceptions.
+
+        The size is the one of the decoded body, transferred the one received
+        for it, which is smaller for compressed responses.
+        """
+        latency_ms = latency * 1000
+
+        self.requests += 1
+        if status != 200:
+            self.errors += 1
+        self.bytes_received += size
+        self.bytes_transferred += size if transferred is None else transferred
+        self.total_latency += latency_ms
+        self.max_latency = max(self.max_latency, latency_ms)
+        self.last_status = status
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, latency_ms)] += 1
+
+    @property
+    def mean_latency(self) -> float | None:
+        if not self.requests:
+            return None
+        return self.total_latency / self.requests
+
+    def percentile(self, quantile: float) -> float | None:
+        """Estimate a latency percentile, as the upper bound of its bucket."""
+        if not self.requests:
+            return None
+
+        rank = quantile * self.requests
+        count = 0
+        for index, bucket_count in enumerate(self.histogram):
+            count += bucket_count
+            if count >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max_latency
+
+        return self.max_latency
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "bytes_transferred": self.bytes_transferred,
+            "mean_latency_ms": self.mean_latency,
+            "p95_latency_ms": self.percentile(0.95),
+            "max_latency_ms": self.max_latency,
+            "last_status": self.last_status,
+            "latency_histogram_ms": {
+                **{f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS, self.histogram)},
+                f">{LATENCY_BUCKETS[-1]}": self.histogram[-1],
+            },
+        }
+
+
+class ConnectionMetrics:
+    """Connection and DNS counters of the HTTP session of the API client."""
+
+    def __init__(self):
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "new_connections": self.new_connections,
+            # Every reused connection saves a TCP and TLS handshake
+            "reused_connections": self.reused_connections,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+
+class ApiMetrics:
+    """Per-endpoint metrics of the HomeWizard cloud API client."""
+
+    def __init__(self):
+        self.endpoints = {endpoint: EndpointMetrics() for endpoint in ENDPOINTS}
+        self.connections = ConnectionMetrics()
+
+    def record(self, endpoint: str, latency: float, status: int | None, size: int, transferred: int | None = None) -> None:
+        self.endpoints[endpoint].record(latency, status, size, transferred)
+
+    @property
+    def bytes_saved(self) -> int:
+        """Return the bytes saved by the compression of the responses."""
+        return sum(metrics.bytes_received - metrics.bytes_transferred for metrics in self.endpoints.values())
+
+    def as_dict(self) -> dict:
+        return {
+            **{endpoint: metrics.as_dict() for endpoint, metrics in self.endpoints.items()},
+            "connections": self.connections.as_dict(),
+            "compression_bytes_saved": self.bytes_saved,
+        }
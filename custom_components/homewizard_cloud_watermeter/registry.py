@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.loader import async_get_integration
+
+from .api import HomeWizardCloudApi
+from .cache import async_get_tsdb_cache
+from .const import DOMAIN
+from .discovery import HomeWizardAccountDiscovery
+from .metrics import ApiMetrics
+from .token_store import HomeWizardTokenStore
+from .transport import HomeWizardTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CLIENTS = "clients"
+DATA_CLIENTS_LOCK = "clients_lock"
+
+
+def get_account_id(email: str) -> str:
+    """Return a stable identifier of an account that does not expose the email."""
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:16]
+
+
+def _client_key(email: str, password: str) -> str:
+    # Credentials are part of the key so a wrong password never reuses a valid client
+    return f"{get_account_id(email)}:{hashlib.sha256(password.encode()).hexdigest()}"
+
+
+async def async_acquire_api(hass: HomeAssistant, email: str, password: str) -> HomeWizardCloudApi:
+    """Return the API client of an account, creating it on first use.
+
+    Every call must be balanced by a call to async_release_api.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    clients = domain_data.setdefault(DATA_CLIENTS, {})
+    lock = domain_data.setdefault(DATA_CLIENTS_LOCK, asyncio.Lock())
+
+    key = _client_key(email, password)
+
+    async with lock:
+        client = clients.get(key)
+
+        if client is None:
+            integration = await async_get_integration(hass, DOMAIN)
+            cache = await async_get_tsdb_cache(hass)
+
+            # The connections of the account are counted apart from the other users of the shared pool
+            metrics = ApiMetrics()
+            transport = HomeWizardTransport(hass, metrics.connections)
+
+            api = HomeWizardCloudApi(
+                email,
+                password,
+                transport.session,
+                integration.version,
+                cache,
+                HomeWizardTokenStore(hass, get_account_id(email)),
+                metrics=metrics,
+            )
+
+            # Reuse the token of the previous run if it is still valid
+            await api.async_restore_token()
+
+            client = clients[key] = {
+                "api": api,
+                "discovery": HomeWizardAccountDiscovery(api),
+                "transport": transport,
+                # Entry providing the metric entities of the account
+                "metrics_entry_id": None,
+                "refs": 0,
+            }
+
+        client["refs"] += 1
+        _LOGGER.debug("HomeWizard API client acquired, %s user(s)", client["refs"])
+
+        return client["api"]
+
+
+def _get_client(hass: HomeAssistant, api: HomeWizardCloudApi) -> dict | None:
+    for client in hass.data.get(DOMAIN, {}).get(DATA_CLIENTS, {}).values():
+        if client["api"] is api:
+            return client
+
+    return None
+
+
+@callback
+def async_get_account_discovery(hass: HomeAssistant, api: HomeWizardCloudApi) -> HomeWizardAccountDiscovery | None:
+    """Return the shared device discovery of the account of an acquired API client."""
+    client = _get_client(hass, api)
+    return None if client is None else client["discovery"]
+
+
+@callback
+def async_claim_account_metrics(hass: HomeAssistant, api: HomeWizardCloudApi, entry_id: str) -> bool:
+    """Tell whether an entry provides the metric entities of the account of an acquired API client.
+
+    The first entry asking owns them until async_release_account_metrics,
+    the next entry of the account set up afterwards takes them over.
+    """
+    client = _get_client(hass, api)
+    if client is None:
+        return False
+
+    if client["metrics_entry_id"] is None:
+        client["metrics_entry_id"] = entry_id
+
+    return client["metrics_entry_id"] == entry_id
+
+
+@callback
+def async_release_account_metrics(hass: HomeAssistant, api: HomeWizardCloudApi, entry_id: str) -> None:
+    """Release the metric entities of the account owned by an entry."""
+    client = _get_client(hass, api)
+    if client is not None and client["metrics_entry_id"] == entry_id:
+        client["metrics_entry_id"] = None
+
+
+@callback
+def async_release_api(hass: HomeAssistant, api: HomeWizardCloudApi) -> None:
+    """Release an API client, shutting it down once nobody uses it anymore."""
+    clients = hass.data.get(DOMAIN, {}).get(DATA_CLIENTS, {})
+
+    for key, client in clients.items():
+        if client["api"] is not api:
+            continue
+
+        client["refs"] -= 1
+        if client["refs"] <= 0:
+            api.shutdown()
+            client["transport"].async_detach()
+            clients.pop(key)
+            _LOGGER.debug("HomeWizard API client released")
+        return
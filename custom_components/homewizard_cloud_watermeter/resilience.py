@@ -0,0 +1,109 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Consecutive failures opening a circuit
+CIRCUIT_FAILURE_THRESHOLD = 5
+# Delay before a trial request is let through an open circuit, doubled while it keeps failing
+CIRCUIT_RESET_TIMEOUT = 60
+CIRCUIT_MAX_RESET_TIMEOUT = 900
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stop sending requests to a host that keeps failing.
+
+    After a number of consecutive failures the circuit opens and requests
+    fail right away. Once the reset timeout has passed a single trial request
+    is let through: its success closes the circuit, its failure opens it again
+    for twice as long.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._open_for = reset_timeout
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    @property
+    def retry_in(self) -> float:
+        """Return the number of seconds before a trial request is allowed."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._open_for - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Tell whether a request may be sent, reserving the trial request when half-open."""
+        if self._opened_at is None:
+            return True
+
+        if self._trial_in_flight or self.retry_in > 0:
+            return False
+
+        self._trial_in_flight = True
+        return True
+
+    def check(self) -> None:
+        """Raise CircuitOpenError when no request may be sent."""
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit of HomeWizard {self.name} endpoint is open, retrying in {self.retry_in:.0f} s")
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._open_for = self._reset_timeout
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+
+        if self._trial_in_flight:
+            # The trial request failed, stay open for longer
+            self._trial_in_flight = False
+            self._open_for = min(self._open_for * 2, CIRCUIT_MAX_RESET_TIMEOUT)
+            self._opened_at = time.monotonic()
+        elif self._opened_at is None and self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        return {
+            "open": self.is_open,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self.retry_in),
+        }
+
+
+async def async_retry(
+    func: Callable[[], Awaitable[T | None]],
+    attempts: int,
+    base_delay: float,
+    should_retry: Callable[[], bool] = lambda: True,
+) -> T | None:
+    """Call func until it returns a value, waiting exponentially longer between attempts.
+
+    Gives up early, returning None, when should_retry tells it is pointless.
+    """
+    for attempt in range(attempts):
+        result = await func()
+        if result is not None:
+            return result
+
+        if attempt + 1 == attempts or not should_retry():
+            break
+
+        await asyncio.sleep(base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    return None
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import random
+
+from .const import POLLING_PROFILE_LIVE, POLLING_PROFILE_REALTIME, POLLING_PROFILE_BALANCED, POLLING_PROFILE_ECONOMY
+
+# Width of the buckets produced by the cloud
+BUCKET = timedelta(minutes=15)
+# Delay after a bucket boundary before its data is available in the cloud
+BUCKET_DELAY = timedelta(minutes=2)
+# Minimal delay between two refreshes
+MIN_INTERVAL = timedelta(minutes=5)
+# Random spread applied to backoff intervals so clients do not retry in lockstep
+BACKOFF_JITTER = 0.1
+
+
+@dataclass(frozen=True)
+class PollingProfile:
+    """Polling intervals of a freshness vs request budget profile."""
+
+    active: timedelta
+    idle: timedelta
+    max_backoff: timedelta
+
+
+PROFILES = {
+    POLLING_PROFILE_LIVE: PollingProfile(
+        active=timedelta(minutes=15),
+        idle=timedelta(minutes=15),
+        max_backoff=timedelta(hours=1),
+    ),
+    POLLING_PROFILE_REALTIME: PollingProfile(
+        active=timedelta(minutes=15),
+        idle=timedelta(minutes=30),
+        max_backoff=timedelta(hours=1),
+    ),
+    POLLING_PROFILE_BALANCED: PollingProfile(
+        active=timedelta(minutes=15),
+        idle=timedelta(hours=1),
+        max_backoff=timedelta(hours=3),
+    ),
+    POLLING_PROFILE_ECONOMY: PollingProfile(
+        active=timedelta(hours=1),
+        idle=timedelta(hours=3),
+        max_backoff=timedelta(hours=6),
+    ),
+}
+
+
+class PollingScheduler:
+    """Compute the delay until the next refresh of the coordinator.
+
+    Refreshes are aligned just after the bucket boundaries of the cloud. They
+    speed up while water is being used, and back off with jitter when all
+    devices are offline or when the cloud keeps failing.
+    """
+
+    def __init__(self, profile: str, bucket: timedelta = BUCKET):
+        self.profile = PROFILES.get(profile, PROFILES[POLLING_PROFILE_BALANCED])
+        self.bucket = bucket
+
+    def next_interval(self, now: datetime, active: bool = False, offline: bool = False, failures: int = 0) -> timedelta:
+        """Return the delay until the next refresh."""
+        if failures:
+            return self._jitter(min(self.profile.active * 2 ** failures, self.profile.max_backoff))
+
+        if offline:
+            return self._jitter(self.profile.max_backoff)
+
+        return self._align(now, self.profile.active if active else self.profile.idle)
+
+    def _align(self, now: datetime, interval: timedelta) -> timedelta:
+        """Move the refresh just after the last bucket boundary within the interval."""
+        epoch = now.timestamp()
+        bucket = self.bucket.total_seconds()
+        delay = BUCKET_DELAY.total_seconds()
+
+        # First boundary (plus publication delay) in the last bucket of the interval
+        earliest = epoch + interval.total_seconds() - bucket
+        aligned = earliest - (earliest - delay) % bucket
+        if aligned < earliest:
+            aligned += bucket
+
+        # Never refresh right away, keep a minimal distance with the current refresh
+        while aligned - epoch < MIN_INTERVAL.total_seconds():
+            aligned += bucket
+
+        return timedelta(seconds=aligned - epoch)
+
+    @staticmethod
+    def _jitter(interval: timedelta) -> timedelta:
+        return interval * random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
@@ -1,3 +1,4 @@
+from datetime import timedelta
 import logging
 from homeassistant.components.sensor import (
     EntityCategory,
@@ -5,13 +6,20 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorStateClass,
 )
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_EMAIL
+from .metrics import ENDPOINTS
+from .registry import async_claim_account_metrics, async_release_account_metrics, get_account_id
 
 _LOGGER = logging.getLogger(__name__)
 
+# Only the API latency sensors are polled, the others follow their coordinator
+SCAN_INTERVAL = timedelta(minutes=1)
+
 async def async_setup_entry(hass, entry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
     coordinator = data["coordinator"]
@@ -27,37 +35,73 @@ async def async_setup_entry(hass, entry, async_add_entities):
         entities.append(HomeWizardWifiSensor(coordinator, value))
         entities.append(HomeWizardOnlineSensor(coordinator, value))
 
+    # The API client is shared by the homes of the account, its metrics are exposed once
+    api = data["api"]
+    if async_claim_account_metrics(hass, api, entry.entry_id):
+        entry.async_on_unload(lambda: async_release_account_metrics(hass, api, entry.entry_id))
+
+        account_id = get_account_id(entry.data[CONF_EMAIL])
+        for endpoint in ENDPOINTS:
+            entities.append(HomeWizardApiLatencySensor(api, account_id, endpoint))
+
     async_add_entities(entities)
 
 class HomeWizardBaseSensor(CoordinatorEntity):
-    """Common base for all HomeWizard sensors."""
+    """Common base for all HomeWizard sensors.
+
+    The value is resolved from the coordinator data once per update, and the
+    state is only written when it changed.
+    """
     _attr_has_entity_name = True
 
     def __init__(self, coordinator, value):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._sanitized_identifier = value["device"].get("sanitized_identifier")
+        self._written_state = None
 
         # Unique ID needs to be unique per entity, so we append the class name or a suffix
         # This will be overridden or extended in child classes
         self._attr_unique_id = f"{self._sanitized_identifier}_{self.__class__.__name__}"
 
-    @property
-    def device_info(self):
-        """Return device information to group all entities under the same device."""
-        device = self.coordinator.data.get(self._sanitized_identifier)["device"]
-
-        # Ensure we have a valid device
-        if not device:
-            return None
-
-        return {
+        device = value["device"]
+        self._attr_device_info = {
             "identifiers": {(DOMAIN, self._sanitized_identifier)},
             "name": device.get("name", "HomeWizard Watermeter"),
             "manufacturer": "HomeWizard",
             "model": device.get("model"),
             "hw_version": device.get("hardwareVersion"),
         }
+        self._attr_native_value = self._resolve_value(value)
+
+    def _resolve_value(self, value: dict):
+        """Return the value of the sensor from the coordinator data of its device."""
+        raise NotImplementedError
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The platform writes the initial state right after
+        self._written_state = self._get_written_state()
+
+    def _get_written_state(self) -> tuple:
+        """Return what the written state depends on."""
+        # Availability follows the success of the last update
+        return (self.available, self._attr_native_value, self.extra_state_attributes)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Resolve the value of a changed device, and write the state if it differs."""
+        if self._sanitized_identifier in self.coordinator.changed_devices:
+            value = self.coordinator.data.get(self._sanitized_identifier)
+            if value is not None:
+                self._attr_native_value = self._resolve_value(value)
+
+        state = self._get_written_state()
+        if state == self._written_state:
+            return
+
+        self._written_state = state
+        self.async_write_ha_state()
 
 class HomeWizardDailyTotalSensor(HomeWizardBaseSensor, SensorEntity):
     def __init__(self, coordinator, data):
@@ -71,10 +115,13 @@ class HomeWizardDailyTotalSensor(HomeWizardBaseSensor, SensorEntity):
         # Use TOTAL for daily values that reset at midnight
         self._attr_state_class = SensorStateClass.TOTAL
 
-    @property
-    def native_value(self):
+        self._attr_extra_state_attributes = {
+            "statistic_id": f"{DOMAIN}:{self._sanitized_identifier}_total"
+        }
+
+    def _resolve_value(self, value: dict):
         """Return the state of the sensor as a float."""
-        daily_total = self.coordinator.data.get(self._sanitized_identifier)["daily_total"]
+        daily_total = value["daily_total"]
 
         if not daily_total:
             return None
@@ -85,13 +132,6 @@ class HomeWizardDailyTotalSensor(HomeWizardBaseSensor, SensorEntity):
             _LOGGER.warning("Could not convert value '%s' to float", daily_total)
             return None
 
-    @property
-    def extra_state_attributes(self):
-        """Return entity specific state attributes."""
-        return {
-            "statistic_id": f"{DOMAIN}:{self._sanitized_identifier}_total"
-        }
-
 class HomeWizardWifiSensor(HomeWizardBaseSensor, SensorEntity):
     def __init__(self, coordinator, data):
         super().__init__(coordinator, data)
@@ -103,9 +143,8 @@ class HomeWizardWifiSensor(HomeWizardBaseSensor, SensorEntity):
         self._attr_icon = "mdi:wifi"
         self._attr_entity_registry_enabled_default = False
 
-    @property
-    def native_value(self):
-        return self.coordinator.data.get(self._sanitized_identifier)["device"].get("wifiStrength", 0)
+    def _resolve_value(self, value: dict):
+        return value["device"].get("wifiStrength", 0)
 
 class HomeWizardOnlineSensor(HomeWizardBaseSensor, SensorEntity):
     def __init__(self, coordinator, data):
@@ -117,6 +156,52 @@ class HomeWizardOnlineSensor(HomeWizardBaseSensor, SensorEntity):
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._attr_entity_registry_enabled_default = False
 
+    def _resolve_value(self, value: dict):
+        return value["device"].get("onlineState", "Unknown")
+
+class HomeWizardApiLatencySensor(SensorEntity):
+    """Mean latency of an endpoint of the HomeWizard cloud, for all homes of an account.
+
+    Every request updates the metrics, also the ones of an update cycle that
+    left the data unchanged and notified no entity, so the sensor is polled.
+    """
+    _attr_has_entity_name = True
+    _attr_should_poll = True
+
+    def __init__(self, api, account_id, endpoint):
+        self._api = api
+        self._endpoint = endpoint
+
+        self._attr_name = f"{endpoint.capitalize()} API latency"
+        self._attr_unique_id = f"account_{account_id}_{endpoint}_api_latency"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 0
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_entity_registry_enabled_default = False
+        # Group the metrics of the account under a service device
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"account_{account_id}")},
+            "name": "HomeWizard Cloud",
+            "manufacturer": "HomeWizard",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+
     @property
     def native_value(self):
-        return self.coordinator.data.get(self._sanitized_identifier)["device"].get("onlineState", "Unknown")
+        return self._api.metrics.endpoints[self._endpoint].mean_latency
+
+    @property
+    def extra_state_attributes(self):
+        """Return the counters of the endpoint."""
+        metrics = self._api.metrics.endpoints[self._endpoint]
+        return {
+            "requests": metrics.requests,
+            "errors": metrics.errors,
+            "bytes_received": metrics.bytes_received,
+            "bytes_transferred": metrics.bytes_transferred,
+            "p95_latency_ms": metrics.percentile(0.95),
+            "max_latency_ms": metrics.max_latency,
+        }
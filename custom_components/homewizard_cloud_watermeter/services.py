@@ -0,0 +1,100 @@
+import logging
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DOMAIN,
+    SERVICE_BACKFILL_HISTORY,
+    SERVICE_REFRESH_DEVICES,
+    SERVICE_DUMP_UPDATE_TRACES,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_START_DATE,
+    ATTR_END_DATE,
+    ATTR_PROFILE_NEXT_CYCLE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_HISTORY_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Required(ATTR_START_DATE): cv.date,
+    vol.Required(ATTR_END_DATE): cv.date,
+})
+
+REFRESH_DEVICES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+})
+
+DUMP_UPDATE_TRACES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_PROFILE_NEXT_CYCLE, default=False): cv.boolean,
+})
+
+
+def _get_entry_data(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """Return the runtime data of the config entry targeted by a service call."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry_data = hass.data.get(DOMAIN, {}).get(entry_id)
+
+    if not entry_data:
+        raise ServiceValidationError(f"HomeWizard config entry {entry_id} is not loaded")
+
+    return entry_data
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_backfill_history(call: ServiceCall) -> None:
+        start_date = call.data[ATTR_START_DATE]
+        end_date = call.data[ATTR_END_DATE]
+
+        if start_date > end_date:
+            raise ServiceValidationError("The start date must be before the end date")
+
+        await _get_entry_data(hass, call)["backfill"].async_backfill(start_date, end_date)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL_HISTORY,
+        async_backfill_history,
+        schema=BACKFILL_HISTORY_SCHEMA,
+    )
+
+    async def async_refresh_devices(call: ServiceCall) -> None:
+        coordinator = _get_entry_data(hass, call)["coordinator"]
+
+        coordinator.async_request_discovery()
+        await coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH_DEVICES,
+        async_refresh_devices,
+        schema=REFRESH_DEVICES_SCHEMA,
+    )
+
+    async def async_dump_update_traces(call: ServiceCall) -> ServiceResponse:
+        coordinator = _get_entry_data(hass, call)["coordinator"]
+        traces = coordinator.get_traces()
+
+        if call.data[ATTR_PROFILE_NEXT_CYCLE]:
+            coordinator.async_profile_next_cycle()
+
+        if not call.return_response:
+            for trace in traces:
+                _LOGGER.info("HomeWizard update trace: %s", trace)
+            return None
+
+        return {"traces": traces}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_UPDATE_TRACES,
+        async_dump_update_traces,
+        schema=DUMP_UPDATE_TRACES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
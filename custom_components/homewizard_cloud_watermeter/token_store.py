@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, TOKEN_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HomeWizardTokenStore:
+    """Persist the access token of an account across restarts.
+
+    The token is stored in a private file and obscured with a key derived from
+    the account, so it does not appear in clear text in the storage directory.
+    This is obfuscation, not encryption.
+    """
+
+    def __init__(self, hass: HomeAssistant, account_id: str):
+        self._store = Store(hass, TOKEN_STORAGE_VERSION, f"{DOMAIN}.{account_id}.token", private=True)
+        self._key = hashlib.sha256(f"{DOMAIN}:{account_id}".encode()).digest()
+
+    async def async_load(self) -> tuple[str, float] | None:
+        """Return the stored token and its expiry timestamp."""
+        stored = await self._store.async_load()
+        if not stored:
+            return None
+
+        try:
+            return self._unobscure(stored["token"]), stored["expires_at"]
+        except (KeyError, ValueError) as ex:
+            _LOGGER.debug("Ignoring invalid stored HomeWizard token: %s", ex)
+            return None
+
+    async def async_save(self, token: str, expires_at: float) -> None:
+        """Store the token and its expiry timestamp."""
+        await self._store.async_save({"token": self._obscure(token), "expires_at": expires_at})
+
+    async def async_remove(self) -> None:
+        """Remove the stored token."""
+        await self._store.async_remove()
+
+    def _obscure(self, value: str) -> str:
+        return base64.b64encode(self._xor(value.encode())).decode()
+
+    def _unobscure(self, value: str) -> str:
+        return self._xor(base64.b64decode(value)).decode()
+
+    def _xor(self, data: bytes) -> bytes:
+        return bytes(byte ^ self._key[index % len(self._key)] for index, byte in enumerate(data))
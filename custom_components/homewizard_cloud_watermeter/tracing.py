@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+import cProfile
+import io
+import logging
+import pstats
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of functions kept in the profile of a traced cycle
+PROFILE_TOP_FUNCTIONS = 40
+
+
+class UpdateTrace:
+    """Per-phase and per-device timings of a single update cycle.
+
+    Phases running concurrently overlap, each duration is the wall time
+    spent in the phase.
+    """
+
+    def __init__(self, started_at: str, profile: bool = False):
+        self.started_at = started_at
+        self.phases: dict[str, float] = {}
+        self.devices: dict[str, dict[str, float]] = {}
+        self.error: str | None = None
+        self.profile: str | None = None
+        self._start = time.perf_counter()
+        self._duration: float | None = None
+        self._profiler = None
+
+        if profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as err:
+                # Only one profiler can run at a time, e.g. while the profiler integration is running
+                _LOGGER.warning("Update cycle not profiled: %s", err)
+                self.profile = f"profiling unavailable: {err}"
+            else:
+                self._profiler = profiler
+
+    @contextmanager
+    def phase(self, name: str, device: str | None = None):
+        """Time the enclosed block as a phase of the cycle or of a device."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            timings = self.phases if device is None else self.devices.setdefault(device, {})
+            # A phase may be entered several times, for example by retries
+            timings[name] = timings.get(name, 0.0) + duration
+
+    def finish(self, error: Exception | None = None) -> None:
+        """Stop the trace, and the profiler if any."""
+        self._duration = time.perf_counter() - self._start
+
+        if error is not None:
+            self.error = repr(error)
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(self._profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            self.profile = output.getvalue()
+            self._profiler = None
+
+    def as_dict(self) -> dict:
+        """Return the trace with durations in milliseconds."""
+        trace = {
+            "started_at": self.started_at,
+            "duration_ms": None if self._duration is None else round(self._duration * 1000, 3),
+            "phases_ms": {name: round(duration * 1000, 3) for name, duration in self.phases.items()},
+            "devices_ms": {
+                device: {name: round(duration * 1000, 3) for name, duration in timings.items()}
+                for device, timings in self.devices.items()
+            },
+        }
+
+        if self.error is not None:
+            trace["error"] = self.error
+        if self.profile is not None:
+            trace["profile"] = self.profile
+
+        return trace
@@ -0,0 +1,50 @@
+import logging
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .metrics import ConnectionMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HomeWizardTransport:
+    """HTTP session of an account, counting its connections.
+
+    The session is built on the connector shared by Home Assistant, with its
+    connection pool, DNS resolver and SSL context, and like every aiohttp
+    session accepts compressed responses. The connections opened and reused,
+    and the DNS cache hits, are counted into the given metrics.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: ConnectionMetrics):
+        self.metrics = metrics
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+
+        # Home Assistant closes the shared connector when it stops
+        self.session = async_create_clientsession(hass, auto_cleanup=False, trace_configs=[trace_config])
+
+    @callback
+    def async_detach(self) -> None:
+        """Detach the session, the shared connector stays open for the other users."""
+        self.session.detach()
+        _LOGGER.debug("HomeWizard HTTP session detached: %s", self.metrics.as_dict())
+
+    async def _on_connection_create_end(self, session, context, params) -> None:
+        self.metrics.new_connections += 1
+
+    async def _on_connection_reuseconn(self, session, context, params) -> None:
+        self.metrics.reused_connections += 1
+
+    async def _on_dns_cache_hit(self, session, context, params) -> None:
+        self.metrics.dns_cache_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params) -> None:
+        self.metrics.dns_cache_misses += 1
@@ -0,0 +1,8 @@
+"""Fixtures of the test suite.
+
+Run from the repository root:
+
+    pytest tests
+"""
+
+pytest_plugins = "pytest_homeassistant_custom_component"
@@ -0,0 +1,153 @@
+"""Local stand-in for the HomeWizard cloud endpoints, shared by the tests and the benchmarks."""
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timedelta
+import random
+from zoneinfo import ZoneInfo
+
+from aiohttp import web
+
+HOME_ID = 1234
+
+
+class MockHomeWizardCloud:
+    """Serve the auth, locations, GraphQL and TSDB endpoints from a single local server.
+
+    Latency and error rate are applied to every request, and requests are
+    counted per endpoint so benchmarks can report them, with the client
+    connections they came in on. Responses are
+    compressed when compress is set and the client accepts it. Every
+    authentication issues a new token, and revoked tokens are rejected.
+    """
+
+    def __init__(self, devices: int = 1, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0, compress: bool = False):
+        self.devices = [f"watermeter/{index:06x}" for index in range(devices)]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.compress = compress
+        self.requests: Counter[str] = Counter()
+        # Address of the client end of every connection that sent a request
+        self.connections: set[tuple] = set()
+        self.revoked_tokens: set[str] = set()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self._url = ""
+
+    @property
+    def base_urls(self) -> dict[str, str]:
+        """Base URLs to give to HomeWizardCloudApi."""
+        return {endpoint: self._url for endpoint in ("auth", "locations", "graphql", "tsdb")}
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def __aenter__(self) -> "MockHomeWizardCloud":
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/v1/auth/account/token", self._handle_token)
+        app.router.add_get("/locations", self._handle_locations)
+        app.router.add_post("/v1/graphql", self._handle_graphql)
+        app.router.add_post("/devices/date/{year}/{month}/{day}", self._handle_tsdb)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self._url = f"http://127.0.0.1:{port}"
+
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self._runner.cleanup()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[self._endpoint(request.path)] += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500)
+
+        if request.headers.get("Authorization", "").removeprefix("Bearer ") in self.revoked_tokens:
+            return web.Response(status=401)
+
+        response = await handler(request)
+        if self.compress:
+            response.enable_compression()
+
+        return response
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        if path.startswith("/v1/auth"):
+            return "auth"
+        if path.startswith("/v1/graphql"):
+            return "graphql"
+        if path.startswith("/devices"):
+            return "tsdb"
+        return "locations"
+
+    async def _handle_token(self, request: web.Request) -> web.Response:
+        return web.json_response({"access_token": f"token-{self.requests['auth']}", "expires_in": 3600})
+
+    async def _handle_locations(self, request: web.Request) -> web.Response:
+        return web.json_response([{"id": HOME_ID, "name": "Benchmark", "location": "Local"}])
+
+    async def _handle_graphql(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+
+        devices = []
+        for index, identifier in enumerate(self.devices):
+            device = {"identifier": identifier, "wifiStrength": 60 + index % 40, "onlineState": "online"}
+            if payload.get("operationName") == "DeviceList":
+                device.update({
+                    "name": f"Watermeter {index}",
+                    "type": "watermeter",
+                    "model": "HWE-WTR",
+                    "hardwareVersion": "1",
+                })
+            devices.append(device)
+
+        variables = payload.get("variables") or {}
+        if "homeId" not in variables:
+            # Aliased query of several homes, which all hold the same devices here
+            return web.json_response({"data": {f"home{index}": {"devices": devices} for index in range(len(variables))}})
+
+        return web.json_response({"data": {"home": {"devices": devices}}})
+
+    async def _handle_tsdb(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        day = date(int(request.match_info["year"]), int(request.match_info["month"]), int(request.match_info["day"]))
+
+        series = [
+            {"identifier": device["identifier"], "values": self._build_values(day, ZoneInfo(payload["tz"]), device["identifier"], payload.get("gb", "15m"))}
+            for device in payload["devices"]
+        ]
+
+        if len(series) == 1:
+            return web.json_response({"values": series[0]["values"]})
+
+        return web.json_response({"devices": series})
+
+    @staticmethod
+    def _build_values(day: date, timezone: ZoneInfo, identifier: str, granularity: str) -> list[dict]:
+        """Build a day of buckets ("5m", "15m" or "1h"), future buckets being null."""
+        now = datetime.now(timezone)
+        width = timedelta(hours=1) if granularity == "1h" else timedelta(minutes=int(granularity.rstrip("m")))
+        seed = sum(identifier.encode())
+
+        values = []
+        current = datetime.combine(day, datetime.min.time(), tzinfo=timezone)
+        end = current + timedelta(days=1)
+
+        while current < end:
+            water = None if current > now else float((current.hour * 7 + current.minute + seed) % 5)
+            values.append({"time": current.isoformat(), "water": water})
+            current = (current.astimezone(ZoneInfo("UTC")) + width).astimezone(timezone)
+
+        return values
@@ -0,0 +1,95 @@
+"""Tests of the hourly aggregation."""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.homewizard_cloud_watermeter.aggregation import (
+    HOUR,
+    SHORT_TERM_PERIOD,
+    HourlyBinner,
+    find_reconciliation_start,
+)
+
+UTC = ZoneInfo("UTC")
+
+
+def _build_day(day: datetime, bucket_minutes: int = 15) -> list[dict]:
+    """Build a day of buckets of 1 L, as returned by the TSDB reader."""
+    values = []
+    current = day
+    while current < day + timedelta(days=1):
+        values.append({"time": current.isoformat(), "water": 1.0})
+        current = (current.astimezone(UTC) + timedelta(minutes=bucket_minutes)).astimezone(day.tzinfo)
+    return values
+
+
+def _expected_bins(values: list[dict], period: int) -> dict[int, float]:
+    bins: dict[int, float] = {}
+    for value in values:
+        timestamp = int(datetime.fromisoformat(value["time"]).timestamp())
+        start = timestamp - timestamp % period
+        bins[start] = bins.get(start, 0.0) + value["water"]
+    return bins
+
+
+@pytest.mark.parametrize("timezone", ["Europe/Amsterdam", "Asia/Kolkata", "America/New_York"])
+@pytest.mark.parametrize("day", [datetime(2024, 3, 31), datetime(2024, 10, 27), datetime(2024, 6, 1)])
+@pytest.mark.parametrize("period", [HOUR, SHORT_TERM_PERIOD])
+def test_bins_match_per_value_parsing(timezone: str, day: datetime, period: int) -> None:
+    """Days binned per hour string, DST transitions and half-hour offsets included, match per-value parsing."""
+    tz = ZoneInfo(timezone)
+    values = _build_day(day.replace(tzinfo=tz))
+    values[5]["water"] = None
+
+    binner = HourlyBinner(tz, now=(day + timedelta(days=2)).replace(tzinfo=tz).timestamp(), period=period)
+    total = binner.add(values)
+
+    assert binner.bins == _expected_bins([value for value in values if value["water"] is not None], period)
+    assert total == len(values) - 1
+
+
+def test_future_buckets_are_ignored() -> None:
+    tz = ZoneInfo("Europe/Amsterdam")
+    day = datetime(2024, 6, 1, tzinfo=tz)
+
+    binner = HourlyBinner(tz, now=(day + timedelta(hours=5)).timestamp())
+    binner.add(_build_day(day))
+
+    assert max(binner.bins) == (day + timedelta(hours=6)).timestamp()
+
+
+def test_reconciliation_starts_at_a_changed_hour() -> None:
+    imported = {0: 1.0, HOUR: 2.0, 2 * HOUR: 3.0}
+
+    assert find_reconciliation_start(dict(imported), imported, 2 * HOUR, 10.0) == (None, 10.0)
+    assert find_reconciliation_start({0: 1.0, HOUR: 5.0, 2 * HOUR: 3.0}, imported, 2 * HOUR, 10.0) == (HOUR, 5.0)
+    # A new hour is imported even without usage
+    assert find_reconciliation_start({**imported, 3 * HOUR: 0.0}, imported, 2 * HOUR, 10.0) == (3 * HOUR, 10.0)
+
+
+def test_reconciliation_of_hours_without_usage() -> None:
+    """An hour of the window that was never written counts as no usage."""
+    imported = {0: 1.0, 2 * HOUR: 3.0}
+
+    assert find_reconciliation_start({0: 1.0, HOUR: 0.0, 2 * HOUR: 3.0}, imported, 2 * HOUR, 10.0) == (None, 10.0)
+    assert find_reconciliation_start({0: 1.0, HOUR: 2.0, 2 * HOUR: 3.0}, imported, 2 * HOUR, 10.0) == (HOUR, 7.0)
+    assert find_reconciliation_start({0: 0.0, 2 * HOUR: 3.0}, imported, 2 * HOUR, 10.0) == (0, 6.0)
+
+
+def test_reconciliation_of_a_growing_partial_hour() -> None:
+    imported = {HOUR: 2.0, 2 * HOUR: 1.0}
+
+    assert find_reconciliation_start({HOUR: 2.0, 2 * HOUR: 2.5}, imported, 2 * HOUR, 10.0) == (2 * HOUR, 9.0)
+
+
+def test_reconciliation_without_window() -> None:
+    """Without imported usage, the hours up to the last imported one are left alone."""
+    bins = {HOUR: 9.0, 2 * HOUR: 9.0}
+
+    assert find_reconciliation_start(bins, {}, 2 * HOUR, 10.0) == (None, 10.0)
+    assert find_reconciliation_start({**bins, 3 * HOUR: 1.0}, {}, 2 * HOUR, 10.0) == (3 * HOUR, 10.0)
+    # Nothing imported yet
+    assert find_reconciliation_start(bins, {}, None, 0.0) == (HOUR, 0.0)
+    # Hours before the window can not be compared
+    assert find_reconciliation_start(bins, {2 * HOUR: 9.0}, 2 * HOUR, 10.0) == (None, 10.0)
@@ -0,0 +1,50 @@
+"""Tests of the HomeWizard cloud client."""
+import asyncio
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .mock_cloud import MockHomeWizardCloud, HOME_ID
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+
+
+class MemoryTokenStore:
+    """Token storage kept in memory."""
+
+    def __init__(self, token: str, expires_at: float):
+        self.stored = (token, expires_at)
+
+    async def async_load(self):
+        return self.stored
+
+    async def async_save(self, token: str, expires_at: float) -> None:
+        self.stored = (token, expires_at)
+
+
+async def test_rejected_token_is_renewed_once(hass: HomeAssistant, socket_enabled) -> None:
+    """A restored token revoked before its expiry is renewed once, and the requests are sent again."""
+    token_store = MemoryTokenStore("revoked-token", time.time() + 3600)
+
+    async with MockHomeWizardCloud(devices=2) as cloud:
+        cloud.revoked_tokens.add("revoked-token")
+        api = HomeWizardCloudApi(
+            "user@example.com", "secret", async_get_clientsession(hass), "test", token_store=token_store, base_urls=cloud.base_urls
+        )
+        assert await api.async_restore_token()
+
+        responses = await asyncio.gather(*(api.async_get_devices(HOME_ID) for _ in range(3)))
+
+        assert all(len(response["data"]["home"]["devices"]) == 2 for response in responses)
+        assert cloud.requests["auth"] == 1
+        assert cloud.requests["graphql"] == 6
+        assert token_store.stored[0] == "token-1"
+
+        # A token rejected again is not retried in a loop
+        cloud.revoked_tokens.add("token-1")
+        cloud.revoked_tokens.add("token-2")
+        assert await api.async_get_devices(HOME_ID) is None
+        assert cloud.requests["auth"] == 2
+        assert cloud.requests["graphql"] == 8
+
+        api.shutdown()
@@ -0,0 +1,105 @@
+"""Tests of the history backfill."""
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMeanType, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, statistics_during_period
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.homewizard_cloud_watermeter.backfill import HomeWizardHistoryBackfill
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+
+STATISTIC_ID = f"{DOMAIN}:watermeter_000000_total"
+
+
+async def _async_add_statistics(hass: HomeAssistant, sums: dict[datetime, float]) -> None:
+    metadata = StatisticMetaData(
+        has_sum=True,
+        name="Watermeter Total",
+        source=DOMAIN,
+        statistic_id=STATISTIC_ID,
+        unit_of_measurement=UnitOfVolume.LITERS,
+        unit_class=SensorDeviceClass.VOLUME,
+        mean_type=StatisticMeanType.NONE,
+    )
+    async_add_external_statistics(
+        hass,
+        metadata,
+        [StatisticData(start=start, state=0.0, sum=value) for start, value in sums.items()],
+    )
+    await async_wait_recording_done(hass)
+
+
+async def test_sum_before_ignores_later_rows_of_the_month(recorder_mock, hass: HomeAssistant) -> None:
+    """The starting sum is the one of the last row before the range, not of the end of its month."""
+    await _async_add_statistics(hass, {
+        datetime(2025, 5, 3, 10, tzinfo=dt_util.UTC): 10.0,
+        datetime(2025, 5, 20, 10, tzinfo=dt_util.UTC): 100.0,
+    })
+
+    backfill = HomeWizardHistoryBackfill(hass, MagicMock(), "entry")
+
+    assert await backfill._async_get_sum_before(STATISTIC_ID, datetime(2025, 5, 10, tzinfo=dt_util.UTC)) == 10.0
+    assert await backfill._async_get_sum_before(STATISTIC_ID, datetime(2025, 5, 3, 10, tzinfo=dt_util.UTC)) == 0.0
+    assert await backfill._async_get_sum_before(STATISTIC_ID, datetime(2025, 6, 1, tzinfo=dt_util.UTC)) == 100.0
+    assert await backfill._async_get_sum_before(f"{DOMAIN}:unknown_total", datetime(2025, 6, 1, tzinfo=dt_util.UTC)) == 0.0
+
+
+async def test_checkpoint_sums_of_a_hole_before_the_install(recorder_mock, hass: HomeAssistant) -> None:
+    """A backfill of days before the first statistics starts from zero and ends at the sum before them."""
+    await hass.config.async_set_time_zone("UTC")
+    await _async_add_statistics(hass, {
+        datetime(2025, 5, 3, 10, tzinfo=dt_util.UTC): 10.0,
+        datetime(2025, 5, 20, 10, tzinfo=dt_util.UTC): 100.0,
+    })
+
+    coordinator = MagicMock()
+    coordinator.get_statistic_id.return_value = STATISTIC_ID
+    backfill = HomeWizardHistoryBackfill(hass, coordinator, "entry")
+
+    checkpoint = await backfill._async_load_checkpoint(date(2025, 5, 4), date(2025, 5, 10), [{"identifier": "watermeter/000000"}])
+
+    assert checkpoint["statistics"][STATISTIC_ID] == {"sum": 10.0, "end_sum": 10.0}
+
+
+async def test_update_cycle_continues_from_the_shifted_tail(recorder_mock, hass: HomeAssistant) -> None:
+    """Statistics written by the update cycle while the tail is shifted continue from the shifted sums."""
+    await hass.config.async_set_time_zone("UTC")
+    start = datetime(2025, 5, 10, tzinfo=dt_util.UTC)
+    await _async_add_statistics(hass, {start + timedelta(hours=hour): float(hour + 1) for hour in range(3)})
+
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = HomeWizardCloudDataUpdateCoordinator(hass, entry, MagicMock(), 1)
+    device = {"identifier": "watermeter/000000", "sanitized_identifier": "watermeter_000000", "name": "Watermeter"}
+    await coordinator._async_validate_statistics_cursors([device])
+
+    binner = coordinator.create_hourly_binner()
+    binner.bins[int((start + timedelta(hours=3)).timestamp())] = 1.0
+
+    # A backfill of the previous day added 100 L before the tail
+    backfill = HomeWizardHistoryBackfill(hass, coordinator, entry.entry_id)
+    checkpoint = {"statistics": {STATISTIC_ID: {"sum": 100.0, "end_sum": 0.0}}}
+    shift = hass.async_create_task(backfill._async_shift_tails([device], date(2025, 5, 9), checkpoint))
+    inject = hass.async_create_task(coordinator.async_inject_cleaned_stats(binner, device))
+    await asyncio.gather(shift, inject)
+    await async_wait_recording_done(hass)
+
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, start, None, {STATISTIC_ID}, "hour", None, {"sum"}
+    )
+    assert [row["sum"] for row in stats[STATISTIC_ID]] == [101.0, 102.0, 103.0, 104.0]
+
+    # The cursor keeps its window, the next cycle does not read it again
+    await coordinator._async_validate_statistics_cursors([device])
+    assert coordinator._statistics_cursors[STATISTIC_ID]["sum"] == 104.0
+    assert coordinator._statistics_cursors[STATISTIC_ID]["hours"]
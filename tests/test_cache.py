@@ -0,0 +1,72 @@
+"""Tests of the TSDB response cache."""
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.homewizard_cloud_watermeter.cache import SETTLE_DELAY, TsdbResponseCache
+from custom_components.homewizard_cloud_watermeter.const import LATE_DATA_DELAY
+
+
+def _payload(day) -> dict:
+    return {"values": [{"time": f"{day.isoformat()}T{hour:02d}:00:00+00:00", "water": 1.0, "wattage": 5} for hour in range(24)]}
+
+
+async def test_days_are_cached_once_the_late_data_window_is_over(hass: HomeAssistant, freezer) -> None:
+    assert SETTLE_DELAY == LATE_DATA_DELAY
+    await hass.config.async_set_time_zone("UTC")
+    freezer.move_to("2026-10-17 06:00:00+00:00")
+
+    cache = TsdbResponseCache(hass)
+    today = dt_util.now().date()
+
+    # Yesterday is still fetched by the update cycle while its late data may come
+    cache.set("watermeter/1", today - timedelta(days=1), "1h", "UTC", _payload(today - timedelta(days=1)))
+    assert cache.get("watermeter/1", today - timedelta(days=1), "1h", "UTC") is None
+
+    day = today - timedelta(days=2)
+    cache.set("watermeter/1", day, "1h", "UTC", _payload(day))
+
+    cached = cache.get("watermeter/1", day, "1h", "UTC")
+    assert len(cached["values"]) == 24
+    # Only the buckets read by the backfill are kept
+    assert cached["values"][0] == {"time": f"{day.isoformat()}T00:00:00+00:00", "water": 1.0}
+
+
+async def test_days_are_evicted_per_meter(hass: HomeAssistant, freezer) -> None:
+    """A year of every meter of a home fits, each meter only evicts its own days."""
+    await hass.config.async_set_time_zone("UTC")
+    freezer.move_to("2026-10-17 06:00:00+00:00")
+
+    cache = TsdbResponseCache(hass, max_days_per_meter=10)
+    first_day = dt_util.now().date() - timedelta(days=20)
+
+    for meter in range(5):
+        for offset in range(10):
+            day = first_day + timedelta(days=offset)
+            cache.set(f"watermeter/{meter}", day, "1h", "UTC", _payload(day))
+
+    assert all(
+        cache.get(f"watermeter/{meter}", first_day + timedelta(days=offset), "1h", "UTC")
+        for meter in range(5)
+        for offset in range(10)
+    )
+
+    # The least recently used day of the meter goes, the other meters keep theirs
+    cache.get("watermeter/0", first_day, "1h", "UTC")
+    day = first_day + timedelta(days=10)
+    cache.set("watermeter/0", day, "1h", "UTC", _payload(day))
+
+    assert cache.get("watermeter/0", first_day, "1h", "UTC") is not None
+    assert cache.get("watermeter/0", first_day + timedelta(days=1), "1h", "UTC") is None
+    assert cache.get("watermeter/1", first_day + timedelta(days=1), "1h", "UTC") is not None
+
+    # The order of use survives a restart
+    await cache._store.async_save(cache._data_to_save())
+    restored = TsdbResponseCache(hass, max_days_per_meter=10)
+    await restored.async_load()
+    day = first_day + timedelta(days=11)
+    restored.set("watermeter/0", day, "1h", "UTC", _payload(day))
+
+    assert restored.get("watermeter/0", first_day, "1h", "UTC") is not None
+    assert restored.get("watermeter/0", first_day + timedelta(days=2), "1h", "UTC") is None
@@ -0,0 +1,27 @@
+"""Tests of the config flow."""
+import time
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN
+from custom_components.homewizard_cloud_watermeter.registry import get_account_id
+from custom_components.homewizard_cloud_watermeter.token_store import HomeWizardTokenStore
+
+
+async def test_wrong_password_with_a_stored_token(hass: HomeAssistant, enable_custom_integrations) -> None:
+    """A valid token stored for the account does not let a wrong password through."""
+    await HomeWizardTokenStore(hass, get_account_id("user@example.com")).async_save("token", time.time() + 3600)
+
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+
+    with patch.object(HomeWizardCloudApi, "async_authenticate", AsyncMock(return_value=False)) as authenticate:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"email": "user@example.com", "password": "wrong"}
+        )
+
+    assert authenticate.await_count == 1
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_auth"}
@@ -0,0 +1,57 @@
+"""Tests of the discovery shared by the homes of an account."""
+import time
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .mock_cloud import MockHomeWizardCloud, HOME_ID
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+from custom_components.homewizard_cloud_watermeter.const import ACCOUNT_DEVICE_STATES_MAX_AGE, DOMAIN
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+from custom_components.homewizard_cloud_watermeter.discovery import HomeWizardAccountDiscovery
+
+
+async def test_device_states_are_fetched_once_per_account(hass: HomeAssistant, socket_enabled) -> None:
+    """Every home refreshing in the same cycle takes its part of a single state query."""
+    async with MockHomeWizardCloud(devices=2) as cloud:
+        api = HomeWizardCloudApi("user@example.com", "secret", async_get_clientsession(hass), "test", base_urls=cloud.base_urls)
+        discovery = HomeWizardAccountDiscovery(api)
+
+        coordinators = []
+        for home_id in (HOME_ID, HOME_ID + 1):
+            entry = MockConfigEntry(domain=DOMAIN)
+            entry.add_to_hass(hass)
+            coordinators.append(HomeWizardCloudDataUpdateCoordinator(hass, entry, api, home_id, account_discovery=discovery))
+
+        # The second home is not in the locations, it is discovered along with the first one
+        for coordinator in coordinators:
+            watermeters = await coordinator._async_get_watermeters()
+            assert len(watermeters) == 2
+        assert cloud.requests["graphql"] == 2
+
+        # The states come with the device lists
+        for coordinator in coordinators:
+            await coordinator._async_refresh_device_states(coordinator._watermeters)
+        assert cloud.requests["graphql"] == 2
+
+        # The next cycle queries the states of both homes at once
+        cloud.devices.reverse()
+        for coordinator in coordinators:
+            await coordinator._async_refresh_device_states(coordinator._watermeters)
+            assert [device["wifiStrength"] for device in coordinator._watermeters] == [61, 60]
+        assert cloud.requests["graphql"] == 3
+
+        # States left by a home are not handed out once they are old
+        await discovery.async_get_device_states(HOME_ID)
+        assert cloud.requests["graphql"] == 4
+        later = time.monotonic() + ACCOUNT_DEVICE_STATES_MAX_AGE.total_seconds()
+        with patch("custom_components.homewizard_cloud_watermeter.discovery.time.monotonic", return_value=later):
+            states = await discovery.async_get_device_states(HOME_ID + 1)
+        assert cloud.requests["graphql"] == 5
+        assert {device["identifier"] for device in states["data"]["home"]["devices"]} == set(cloud.devices)
+        assert all("name" not in device for device in states["data"]["home"]["devices"])
+
+        api.shutdown()
@@ -0,0 +1,95 @@
+"""Tests of the flow detections."""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.homewizard_cloud_watermeter.aggregation import HourlyBinner
+from custom_components.homewizard_cloud_watermeter.flow import FlowMonitor
+from custom_components.homewizard_cloud_watermeter.live import LiveDailySeries
+
+TZ = ZoneInfo("Europe/Amsterdam")
+DAY = date(2024, 6, 1)
+
+
+def _build_values(day: date, waters: list[float | None]) -> list[dict]:
+    """Build the 15 minute buckets of a day, the ones after the given waters being null."""
+    midnight = datetime(day.year, day.month, day.day, tzinfo=TZ)
+    return [
+        {"time": (midnight + timedelta(minutes=15 * index)).isoformat(), "water": waters[index] if index < len(waters) else None}
+        for index in range(96)
+    ]
+
+
+class FlowFeed:
+    """Feed a monitor the way the coordinator does, through the live series of the day."""
+
+    def __init__(self):
+        self.monitor = FlowMonitor(900)
+        self._series: LiveDailySeries | None = None
+
+    def update(self, day: date, waters: list[float | None]) -> FlowMonitor:
+        if self._series is None or self._series.day != day:
+            self._series = LiveDailySeries(day, lambda: HourlyBinner(TZ))
+        values = _build_values(day, waters)
+        self._series.update(values, now=datetime(2030, 1, 1).timestamp())
+        self.monitor.update(day, values, self._series.changed_from)
+        return self.monitor
+
+
+def test_consecutive_buckets_follow_corrections() -> None:
+    """Buckets rewritten by the interpolation of a later upload are counted again."""
+    feed = FlowFeed()
+
+    # The last bucket is still filling, 8 settled buckets are 2 hours
+    monitor = feed.update(DAY, [1.0] * 9)
+    assert monitor.consecutive == 8
+    assert monitor.continuous_flow
+
+    # The next upload shows the water stopped for a while
+    monitor = feed.update(DAY, [1.0, 1.0, 0.0, 0.0] + [1.0] * 6)
+    assert monitor.consecutive == 5
+    assert not monitor.continuous_flow
+    assert monitor.as_dict()["continuous_flow_minutes"] == 75
+
+    # Corrections of the pending bucket only are not fed twice
+    monitor = feed.update(DAY, [1.0, 1.0, 0.0, 0.0] + [1.0] * 5 + [3.0])
+    assert monitor.consecutive == 5
+    assert monitor.mean_flow == 4 * 7 / 9
+
+
+def test_night_minimum_follows_corrections() -> None:
+    feed = FlowFeed()
+    # Water in every bucket from 0:00 until 5:15
+    waters = [1.0] * 22
+
+    monitor = feed.update(DAY, waters)
+    assert monitor.leak_suspected is True
+    assert monitor.as_dict()["night_min_flow"] == 4.0
+
+    # The water stopped at 3:00, once the interpolated buckets are rewritten
+    waters[12] = 0.0
+    monitor = feed.update(DAY, waters)
+    assert monitor.leak_suspected is False
+    assert monitor.as_dict()["night_min_flow"] == 0.0
+
+
+def test_day_rollover_keeps_the_previous_day() -> None:
+    """The last bucket of a day is fed at the rollover, and corrections of the new day replay from there."""
+    feed = FlowFeed()
+    yesterday = DAY - timedelta(days=1)
+
+    monitor = feed.update(yesterday, [0.0] * 90 + [1.0] * 6)
+    assert monitor.consecutive == 5
+
+    monitor = feed.update(DAY, [1.0] * 3)
+    assert monitor.consecutive == 8
+    assert monitor.continuous_flow
+
+    monitor = feed.update(DAY, [1.0, 0.0, 1.0, 1.0])
+    assert monitor.consecutive == 1
+    assert monitor.leak_suspected is False
+
+    # The buckets of yesterday are kept in the state the replay starts from
+    monitor = feed.update(DAY, [1.0] * 4)
+    assert monitor.consecutive == 9
+    assert monitor.mean_flow == 4 * 9 / 96
+    assert monitor.leak_suspected is False
@@ -0,0 +1,114 @@
+"""Tests of the running daily series."""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.homewizard_cloud_watermeter.aggregation import HOUR, SHORT_TERM_PERIOD, HourlyBinner
+from custom_components.homewizard_cloud_watermeter.live import LiveDailySeries
+
+UTC = ZoneInfo("UTC")
+TZ = ZoneInfo("Europe/Amsterdam")
+
+
+def _build_day(day: datetime, bucket_minutes: int = 15, filled: int | None = None) -> list[dict]:
+    """Build a day of buckets, the ones after the first filled being null like future buckets."""
+    values = []
+    current = day
+    while current < day + timedelta(days=1):
+        index = len(values)
+        water = None if filled is not None and index >= filled else float(index % 3)
+        values.append({"time": current.isoformat(), "water": water})
+        current = (current.astimezone(UTC) + timedelta(minutes=bucket_minutes)).astimezone(day.tzinfo)
+    return values
+
+
+def _create_series(day: datetime, period: int = HOUR) -> tuple[LiveDailySeries, float]:
+    now = (day + timedelta(days=2)).timestamp()
+    return LiveDailySeries(day.date(), lambda: HourlyBinner(day.tzinfo, now=now, period=period)), now
+
+
+def _assert_matches_fresh_binner(series: LiveDailySeries, values: list[dict]) -> None:
+    binner = series._create_binner()
+    total = binner.add([value for value in values if value["water"] is not None])
+
+    assert series.binner.bins == pytest.approx(binner.bins)
+    assert series.total == pytest.approx(total)
+
+
+def test_corrected_buckets_are_merged_as_deltas() -> None:
+    day = datetime(2024, 6, 1, tzinfo=TZ)
+    series, now = _create_series(day)
+    values = _build_day(day, filled=20)
+    series.update(values, now)
+
+    values[3]["water"] = 7.5
+    # A bucket the cloud filled in late
+    values[4]["water"] = None
+    series.update(values, now)
+    _assert_matches_fresh_binner(series, values)
+
+    values[4]["water"] = 2.0
+    assert series.update(values, now) == pytest.approx(sum(value["water"] or 0.0 for value in values))
+    _assert_matches_fresh_binner(series, values)
+
+
+def test_new_buckets_without_usage_get_a_bin() -> None:
+    day = datetime(2024, 6, 1, tzinfo=TZ)
+    series, now = _create_series(day)
+    values = _build_day(day, filled=4)
+    series.update(values, now)
+
+    values[4]["water"] = 0.0
+    values[5]["water"] = 0.0
+    series.update(values, now)
+
+    assert series.binner.bins[int(datetime(2024, 6, 1, 1, tzinfo=TZ).timestamp())] == 0.0
+    _assert_matches_fresh_binner(series, values)
+
+
+def test_misaligned_series_starts_again() -> None:
+    """Buckets that moved, e.g. after a change of granularity, are merged again from scratch."""
+    day = datetime(2024, 6, 1, tzinfo=TZ)
+    series, now = _create_series(day)
+    series.update(_build_day(day, filled=40), now)
+
+    values = _build_day(day, bucket_minutes=5, filled=60)
+    series.update(values, now)
+    _assert_matches_fresh_binner(series, values)
+
+
+def test_midnight_rollover_starts_a_new_day() -> None:
+    day = datetime(2024, 6, 1, tzinfo=TZ)
+    series, now = _create_series(day)
+    series.update(_build_day(day), now)
+
+    values = _build_day(day + timedelta(days=1), filled=3)
+    series.update(values, now)
+    _assert_matches_fresh_binner(series, values)
+
+    values = _build_day(day + timedelta(days=1), filled=10)
+    series.update(values, now)
+    _assert_matches_fresh_binner(series, values)
+
+
+@pytest.mark.parametrize("timezone", ["Europe/Amsterdam", "Asia/Kolkata", "America/New_York"])
+@pytest.mark.parametrize("day", [datetime(2024, 3, 31), datetime(2024, 10, 27), datetime(2024, 6, 1)])
+@pytest.mark.parametrize("period", [HOUR, SHORT_TERM_PERIOD])
+def test_series_matches_binning_the_whole_day(timezone: str, day: datetime, period: int) -> None:
+    """A day merged as it fills in, with corrections, matches binning the final day at once."""
+    day = day.replace(tzinfo=ZoneInfo(timezone))
+    series, now = _create_series(day, period)
+
+    final = _build_day(day)
+    for filled in range(0, len(final) + 1, 7):
+        values = _build_day(day, filled=filled)
+        # The cloud corrects an earlier bucket now and then
+        if filled > 10:
+            values[filled - 10]["water"] += 0.25
+        series.update(values, now)
+        _assert_matches_fresh_binner(series, values)
+
+    series.update(final, now)
+    _assert_matches_fresh_binner(series, final)
+    assert series.day == date(day.year, day.month, day.day)
@@ -0,0 +1,169 @@
+"""Tests of the circuit breakers and retries."""
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .mock_cloud import MockHomeWizardCloud
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN, PARTIAL_RETRY_INTERVAL
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+from custom_components.homewizard_cloud_watermeter.resilience import (
+    CIRCUIT_MAX_RESET_TIMEOUT,
+    CircuitBreaker,
+    CircuitOpenError,
+    async_retry,
+)
+
+
+def test_circuit_lets_a_single_trial_through(freezer) -> None:
+    """An open circuit lets one trial request through after the reset timeout, doubled while it fails."""
+    breaker = CircuitBreaker("tsdb", failure_threshold=2, reset_timeout=60)
+
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    freezer.tick(60)
+    assert breaker.allow_request()
+    # The trial request is still in flight
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.retry_in == 120
+
+    freezer.tick(120)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.as_dict() == {"open": False, "consecutive_failures": 0, "retry_in": 0}
+
+    # Closed again, it takes the threshold to open it and the first reset timeout to retry
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.retry_in == 60
+
+
+def test_circuit_reopens_up_to_the_maximum_timeout(freezer) -> None:
+    breaker = CircuitBreaker("tsdb", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+
+    for _ in range(10):
+        freezer.tick(breaker.retry_in)
+        breaker.check()
+        breaker.record_failure()
+
+    assert breaker.retry_in == CIRCUIT_MAX_RESET_TIMEOUT
+
+
+async def test_client_errors_do_not_open_the_circuit(hass: HomeAssistant, socket_enabled) -> None:
+    """Only server errors and unreachable hosts count as failures of a host."""
+    async with MockHomeWizardCloud() as cloud:
+        api = HomeWizardCloudApi("user@example.com", "secret", async_get_clientsession(hass), "test", base_urls=cloud.base_urls)
+
+        for _ in range(10):
+            status, _ = await api._async_request("graphql", "GET", f"{cloud.base_urls['graphql']}/unknown")
+            assert status == 404
+        assert api.is_available("graphql")
+
+        cloud.error_rate = 1.0
+        for _ in range(5):
+            status, _ = await api._async_request("graphql", "GET", f"{cloud.base_urls['graphql']}/unknown")
+            assert status == 500
+        assert not api.is_available("graphql")
+        with pytest.raises(CircuitOpenError):
+            await api._async_request("graphql", "GET", f"{cloud.base_urls['graphql']}/unknown")
+        assert cloud.requests["locations"] == 15
+
+
+async def test_retry_backs_off_until_a_value() -> None:
+    func = AsyncMock(side_effect=[None, None, "value"])
+
+    with patch("custom_components.homewizard_cloud_watermeter.resilience.asyncio.sleep") as sleep, \
+            patch("custom_components.homewizard_cloud_watermeter.resilience.random.uniform", return_value=1.0):
+        assert await async_retry(func, 3, 2) == "value"
+
+    assert [call.args[0] for call in sleep.await_args_list] == [2, 4]
+
+
+async def test_retry_gives_up_early() -> None:
+    func = AsyncMock(return_value=None)
+
+    with patch("custom_components.homewizard_cloud_watermeter.resilience.asyncio.sleep") as sleep:
+        assert await async_retry(func, 3, 2, should_retry=lambda: False) is None
+
+    assert func.await_count == 1
+    sleep.assert_not_awaited()
+
+
+async def test_failed_devices_are_retried_alone(hass: HomeAssistant) -> None:
+    """Devices whose update failed are refetched alone, sooner, while the others keep their data."""
+    identifiers = ["watermeter/000000", "watermeter/000001", "watermeter/000002"]
+    failing = {"watermeter/000000"}
+    fetched: list[list[str]] = []
+
+    midnight = dt_util.start_of_local_day()
+    # No water in the last bucket, the devices are idle
+    payload = {"values": [{"time": (midnight + timedelta(minutes=15 * index)).isoformat(), "water": 0.0} for index in range(4)]}
+
+    async def async_get_tsdb_data_batch(date, timezone, device_identifiers, granularity):
+        fetched.append(list(device_identifiers))
+        return {identifier: payload for identifier in device_identifiers if identifier not in failing}
+
+    async def async_get_tsdb_data(date, timezone, device_identifier, granularity):
+        fetched.append([device_identifier])
+        return None if device_identifier in failing else payload
+
+    api = MagicMock()
+    api.tsdb_batch_supported = True
+    api.async_ensure_token = AsyncMock()
+    api.async_get_devices = AsyncMock(return_value={"data": {"home": {"devices": [
+        {"identifier": identifier, "type": "watermeter", "onlineState": "online"} for identifier in identifiers
+    ]}}})
+    api.async_get_device_states = AsyncMock(return_value={"data": {"home": {"devices": []}}})
+    api.async_get_tsdb_data_batch = async_get_tsdb_data_batch
+    api.async_get_tsdb_data = async_get_tsdb_data
+    # Retries of a single request give up right away
+    api.is_available.return_value = False
+
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = HomeWizardCloudDataUpdateCoordinator(hass, entry, api, 1)
+
+    await coordinator.async_refresh()
+    assert set(coordinator.data) == {"watermeter_000001", "watermeter_000002"}
+    assert coordinator._retry_devices == failing
+    assert coordinator.update_interval == PARTIAL_RETRY_INTERVAL
+
+    # The retry only fetches the failed device, and backs off while it keeps failing
+    fetched.clear()
+    await coordinator.async_refresh()
+    assert fetched == [["watermeter/000000"]]
+    assert set(coordinator.data) == {"watermeter_000001", "watermeter_000002"}
+    assert coordinator._retry_attempts == 2
+    assert coordinator.update_interval == PARTIAL_RETRY_INTERVAL * 2
+    api.async_get_device_states.assert_not_awaited()
+
+    failing.clear()
+    fetched.clear()
+    await coordinator.async_refresh()
+    assert fetched == [["watermeter/000000"]]
+    assert set(coordinator.data) == {"watermeter_000000", "watermeter_000001", "watermeter_000002"}
+    assert coordinator._retry_devices == set()
+    assert coordinator._retry_attempts == 0
+    assert coordinator.update_interval > PARTIAL_RETRY_INTERVAL * 2
+
+    # The next cycle refreshes every device again
+    fetched.clear()
+    await coordinator.async_refresh()
+    assert fetched == [identifiers]
+    api.async_get_device_states.assert_awaited_once()
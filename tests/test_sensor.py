@@ -0,0 +1,63 @@
+"""Tests of the sensors."""
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .mock_cloud import MockHomeWizardCloud, HOME_ID
+from custom_components.homewizard_cloud_watermeter import api as api_mod
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN
+from custom_components.homewizard_cloud_watermeter.metrics import ENDPOINTS
+from custom_components.homewizard_cloud_watermeter.sensor import SCAN_INTERVAL
+
+
+async def test_api_latency_sensors_once_per_account(
+    hass: HomeAssistant, enable_custom_integrations, socket_enabled, entity_registry: er.EntityRegistry
+) -> None:
+    """The metrics of the account client are exposed once, and polled.
+
+    The stand-in cloud serves both homes over a local socket.
+    """
+    async with MockHomeWizardCloud(devices=0) as cloud:
+        with patch.dict(api_mod.BASE_URLS, cloud.base_urls):
+            entries = []
+            for home_id in (HOME_ID, HOME_ID + 1):
+                entry = MockConfigEntry(domain=DOMAIN, data={"email": "user@example.com", "password": "secret", "home_id": home_id})
+                entry.add_to_hass(hass)
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                entries.append(entry)
+            await hass.async_block_till_done()
+
+            latency_entities = [
+                entity for entity in entity_registry.entities.values() if entity.unique_id.endswith("_api_latency")
+            ]
+            assert len(latency_entities) == len(ENDPOINTS)
+            assert {entity.config_entry_id for entity in latency_entities} == {entries[0].entry_id}
+
+            entity_id = next(entity.entity_id for entity in latency_entities if entity.unique_id.endswith("_tsdb_api_latency"))
+            entity_registry.async_update_entity(entity_id, disabled_by=None)
+            await hass.config_entries.async_reload(entries[0].entry_id)
+            await hass.async_block_till_done()
+
+            # A request made outside of a coordinator update still reaches the sensor
+            api = hass.data[DOMAIN][entries[0].entry_id]["api"]
+            api.metrics.record("tsdb", 0.25, 200, 100)
+            async_fire_time_changed(hass, dt_util.utcnow() + SCAN_INTERVAL)
+            await hass.async_block_till_done()
+
+            state = hass.states.get(entity_id)
+            assert state.attributes["requests"] == 1
+            assert float(state.state) == 250.0
+
+            # The other home of the account takes the metrics over
+            assert await hass.config_entries.async_unload(entries[0].entry_id)
+            await hass.config_entries.async_reload(entries[1].entry_id)
+            await hass.async_block_till_done()
+            assert entity_registry.async_get(entity_id).config_entry_id == entries[1].entry_id
+            assert hass.states.get(entity_id).state != "unavailable"
+
+            assert await hass.config_entries.async_unload(entries[1].entry_id)
+            await hass.async_block_till_done()
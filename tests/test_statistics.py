@@ -0,0 +1,97 @@
+"""Tests of the statistics import of the update cycle."""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+
+STATISTIC_ID = f"{DOMAIN}:watermeter_000000_total"
+DEVICE = {"identifier": "watermeter/000000", "sanitized_identifier": "watermeter_000000", "name": "Watermeter"}
+START = datetime(2025, 5, 10, tzinfo=dt_util.UTC)
+
+
+def _create_coordinator(hass: HomeAssistant, entry: MockConfigEntry) -> HomeWizardCloudDataUpdateCoordinator:
+    return HomeWizardCloudDataUpdateCoordinator(hass, entry, MagicMock(), 1)
+
+
+async def _async_inject(hass: HomeAssistant, coordinator: HomeWizardCloudDataUpdateCoordinator, usages: list[float]) -> list[float]:
+    """Inject the usage of the hours from START on, and return the resulting sums."""
+    await coordinator._async_validate_statistics_cursors([DEVICE])
+
+    binner = coordinator.create_hourly_binner()
+    for hour, usage in enumerate(usages):
+        binner.bins[int((START + timedelta(hours=hour)).timestamp())] = usage
+
+    await coordinator.async_inject_cleaned_stats(binner, DEVICE)
+    await async_wait_recording_done(hass)
+
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, START, None, {STATISTIC_ID}, "hour", None, {"sum"}
+    )
+    return [row["sum"] for row in stats[STATISTIC_ID]]
+
+
+async def test_changed_hours_rebuild_the_tail(recorder_mock, hass: HomeAssistant) -> None:
+    """Hours corrected or filled in by the cloud are imported again, with the sums after them."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = _create_coordinator(hass, entry)
+
+    assert await _async_inject(hass, coordinator, [1.0, 2.0, 3.0]) == [1.0, 3.0, 6.0]
+
+    # An old hour corrected
+    assert await _async_inject(hass, coordinator, [1.0, 4.0, 3.0]) == [1.0, 5.0, 8.0]
+
+    # An hour that turns out to have no usage
+    assert await _async_inject(hass, coordinator, [1.0, 0.0, 3.0]) == [1.0, 1.0, 4.0]
+
+    # The partial current hour growing, then a new hour without usage
+    assert await _async_inject(hass, coordinator, [1.0, 0.0, 5.0]) == [1.0, 1.0, 6.0]
+    assert await _async_inject(hass, coordinator, [1.0, 0.0, 5.0, 0.0]) == [1.0, 1.0, 6.0, 6.0]
+
+    cursor = coordinator._statistics_cursors[STATISTIC_ID]
+    assert cursor["start"] == (START + timedelta(hours=3)).timestamp()
+    assert cursor["sum"] == 6.0
+    assert len(cursor["hours"]) == 4
+
+
+async def test_partial_hour_grows_without_window(recorder_mock, hass: HomeAssistant) -> None:
+    """A cursor read again from the recorder still lets the last imported hour grow."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    assert await _async_inject(hass, _create_coordinator(hass, entry), [1.0, 2.0]) == [1.0, 3.0]
+
+    # Another coordinator, without the stored window
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = _create_coordinator(hass, entry)
+
+    # Only the last hour is known, the earlier ones are left alone
+    assert await _async_inject(hass, coordinator, [9.0, 5.0]) == [1.0, 6.0]
+    assert coordinator._statistics_cursors[STATISTIC_ID]["hours"] == {str(int((START + timedelta(hours=1)).timestamp())): 5.0}
+
+
+async def test_shifted_sums_keep_the_window(recorder_mock, hass: HomeAssistant) -> None:
+    """Sums shifted in the recorder rebase the cursor, which keeps the usage of its hours."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = _create_coordinator(hass, entry)
+    assert await _async_inject(hass, coordinator, [1.0, 2.0, 3.0]) == [1.0, 3.0, 6.0]
+
+    get_instance(hass).async_adjust_statistics(STATISTIC_ID, START, 100.0, UnitOfVolume.LITERS)
+    await async_wait_recording_done(hass)
+    coordinator._validated_statistics.clear()
+
+    # The corrected first hour is still compared with its imported usage
+    assert await _async_inject(hass, coordinator, [2.0, 2.0, 3.0]) == [102.0, 104.0, 107.0]
+    assert coordinator._statistics_cursors[STATISTIC_ID]["sum"] == 107.0
+    assert len(coordinator._statistics_cursors[STATISTIC_ID]["hours"]) == 3
@@ -0,0 +1,57 @@
+"""Tests of the update cycle traces."""
+import asyncio
+import cProfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.homewizard_cloud_watermeter.const import DOMAIN
+from custom_components.homewizard_cloud_watermeter.coordinator import HomeWizardCloudDataUpdateCoordinator
+from custom_components.homewizard_cloud_watermeter.tracing import UpdateTrace
+
+
+def test_profile_unavailable_while_another_profiler_runs() -> None:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        trace = UpdateTrace("2026-10-17T00:00:00+00:00", profile=True)
+        trace.finish()
+    finally:
+        profiler.disable()
+
+    assert trace.as_dict()["profile"].startswith("profiling unavailable")
+
+
+def test_finish_stops_the_profiler() -> None:
+    trace = UpdateTrace("2026-10-17T00:00:00+00:00", profile=True)
+    trace.finish()
+
+    assert "function calls" in trace.as_dict()["profile"]
+    # Another profiler can start once the trace is finished
+    profiler = cProfile.Profile()
+    profiler.enable()
+    profiler.disable()
+
+
+async def test_cancelled_cycle_stops_the_profiler(hass: HomeAssistant) -> None:
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    coordinator = HomeWizardCloudDataUpdateCoordinator(hass, entry, MagicMock(), 1)
+    coordinator.async_profile_next_cycle()
+
+    with (
+        patch.object(coordinator, "_async_fetch_data", side_effect=asyncio.CancelledError),
+        pytest.raises(asyncio.CancelledError),
+    ):
+        await coordinator._async_update_data()
+
+    assert coordinator._profile_next_cycle is False
+    trace = coordinator.get_traces()[-1]
+    assert trace["error"] == "CancelledError()"
+    assert "profile" in trace
+    profiler = cProfile.Profile()
+    profiler.enable()
+    profiler.disable()
@@ -0,0 +1,31 @@
+"""Tests of the HTTP session of an account."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .mock_cloud import MockHomeWizardCloud, HOME_ID
+from custom_components.homewizard_cloud_watermeter.api import HomeWizardCloudApi
+from custom_components.homewizard_cloud_watermeter.metrics import ApiMetrics
+from custom_components.homewizard_cloud_watermeter.transport import HomeWizardTransport
+
+
+async def test_session_on_the_shared_connector(hass: HomeAssistant, socket_enabled) -> None:
+    """Responses come compressed over pooled connections, and detaching keeps the pool open."""
+    metrics = ApiMetrics()
+    transport = HomeWizardTransport(hass, metrics.connections)
+    assert transport.session.connector is async_get_clientsession(hass).connector
+
+    async with MockHomeWizardCloud(devices=50, compress=True) as cloud:
+        api = HomeWizardCloudApi("user@example.com", "secret", transport.session, "test", base_urls=cloud.base_urls, metrics=metrics)
+        for _ in range(3):
+            assert await api.async_get_devices(HOME_ID)
+
+        graphql = metrics.endpoints["graphql"]
+        assert graphql.bytes_transferred < graphql.bytes_received
+        assert metrics.connections.new_connections == len(cloud.connections) == 1
+        assert metrics.connections.reused_connections >= 2
+
+        api.shutdown()
+
+    transport.async_detach()
+    assert transport.session.closed
+    assert not async_get_clientsession(hass).connector.closed